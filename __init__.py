@@ -1,31 +1,317 @@
 import os
+import re
+import sys
 import json
+import inspect
+import tracemalloc
+from functools import partial
 from contextlib import redirect_stdout
 from .prestartup_script import on_custom_nodes_loaded
 from .config import load_hooks, load_default_hooks, get_user_hooks_path
+from .sinks import LineSink, LineFilterSink
+from .filters import make_line_filter
+from .stream import StatsStream
+from .sampling import make_sampler
+from .catalog import CatalogVersion, public_methods
+from .profiling import MemoryProfile, CpuProfile
+from .targets import LazyImportHook, parse_target, format_target, resolve_owner
 
 NAME = "ComfyUI Remove Print"
 
 # Hook state management: {(node_name, method_name): original_method}
+# Target hooks use ("module.path:Qualified", name) as the key
 _hooked_methods = {}
 
+# Pass-through samplers of hooks with sampling enabled: {hook_key: Sampler}
+_samplers = {}
+
+# Memory profiles by hook name; kept across reloads until cleared via the API
+_memory_profiles = {}
+
+# Profiling hooks stacked on top of whatever owner.attr was when installed:
+# {(owner_name, attr, hook_type): (previous, hooked)}, in installation order
+_stacked_hooks = {}
+
+# Hook types that stack on top of an existing hook instead of being skipped
+_STACKED_TYPES = ("memory", "cpu")
+
+# Installed "cpu" hooks: {hook_key: CpuProfile}
+_cpu_hooks = {}
+
+# CPU profiles by hook name; kept across reloads until cleared via the API
+_cpu_profiles = {}
+
 # Reference to node class mappings (used for reloading)
 _node_class_mappings = {}
 
+# Live stats pushed to subscribed settings dialogs
+stats_stream = StatsStream()
+
+# Version of the node/locale catalog cached by the settings UI
+catalog_version = CatalogVersion(os.path.join(os.path.dirname(os.path.abspath(__file__)), "locales"))
+
 
 def console_print(*args):
     for argv in args:
         print(f"[{NAME}]: " + argv)
 
 
-def _apply_hooks(mappings: dict):
-    """Apply hooks based on settings. Only enabled hooks are applied."""
-    hooks = load_hooks()
-    hook_dict = {hook["node"]: hook for hook in hooks}
+def _make_hooked_method(hook_name, original, sampler=None, line_filter=None):
+    def hooked_method(*args, **kwargs):
+        if sampler is not None and sampler.should_sample():
+            return original(*args, **kwargs)
+
+        streaming = stats_stream.active
+        if not streaming and line_filter is None:
+            with redirect_stdout(open(os.devnull, 'w')):
+                return original(*args, **kwargs)
+
+        if streaming:
+            stats_stream.record_call(hook_name)
+        on_line = partial(stats_stream.record_line, hook_name) if streaming else None
+
+        if line_filter is None:
+            # The stream cuts lines to max_line_length, so longer pending lines are not kept
+            sink = LineSink(on_line, max_length=stats_stream.max_line_length)
+        else:
+            # Kept lines go to the stdout the hooked method would have used
+            sink = LineFilterSink(line_filter, sys.stdout, on_drop=on_line)
+        try:
+            with redirect_stdout(sink):
+                return original(*args, **kwargs)
+        finally:
+            sink.close()
+    return hooked_method
+
+
+def _make_profiled_method(profile, original):
+    def profiled_method(*args, **kwargs):
+        return profile.run(original, args, kwargs)
+    return profiled_method
+
+
+def _suppress_wrapper(hook_key, hook_name: str, hook: dict):
+    """Return a function wrapping a method for a "suppress" hook (the default type)."""
+    try:
+        sampler = make_sampler(hook)
+    except (TypeError, ValueError) as e:
+        console_print(f"""Invalid sampling for {hook_name}, suppressing all calls: {e}""")
+        sampler = None
+
+    try:
+        line_filter = make_line_filter(hook)
+    except (TypeError, re.error) as e:
+        console_print(f"""Invalid line filter for {hook_name}, suppressing all output: {e}""")
+        line_filter = None
+
+    if sampler is not None:
+        _samplers[hook_key] = sampler
+    return lambda func: _make_hooked_method(hook_name, func, sampler, line_filter)
+
+
+def _memory_wrapper(hook_key, hook_name: str, hook: dict):
+    """Return a function wrapping a method for a "memory" profiling hook."""
+    profile = _memory_profiles.get(hook_name)
+    if profile is None:
+        profile = _memory_profiles[hook_name] = MemoryProfile()
+    return lambda func: _make_profiled_method(profile, func)
+
+
+def _cpu_wrapper(hook_key, hook_name: str, hook: dict):
+    """Return a function wrapping a method for a "cpu" profiling hook, or None to skip it."""
+    profile = _cpu_profiles.get(hook_name)
+    if profile is not None and profile.complete:
+        console_print(f"""Skipped (profile complete): {hook_name}""")
+        return None
+
+    if profile is None:
+        try:
+            target_calls = int(hook.get("calls", 1))
+        except (TypeError, ValueError):
+            target_calls = 0
+        if target_calls < 1:
+            console_print(f"""Invalid "calls" for {hook_name}: {hook.get("calls")}""")
+            return None
+        profile = _cpu_profiles[hook_name] = CpuProfile(target_calls)
+
+    profile.on_complete = lambda: _finish_cpu_hook(hook_key, profile)
+    _cpu_hooks[hook_key] = profile
+    return lambda func: _make_profiled_method(profile, func)
+
+
+def _finish_cpu_hook(hook_key, profile):
+    """Remove a "cpu" hook once its profile has collected all calls.
+
+    Runs in the profiled call's thread, possibly while hooks are reloaded,
+    so errors are reported instead of raised into the node's call.
+    """
+    try:
+        _remove_cpu_hook(hook_key, profile)
+    except Exception as e:
+        console_print(f"""Failed to remove completed cpu hook {format_target(*hook_key[:2])}: {e}""")
+
+
+def _remove_cpu_hook(hook_key, profile):
+    """Put back the wrapper a completed "cpu" hook was stacked on (e.g. a suppress hook)."""
+    if _cpu_hooks.get(hook_key) is not profile:
+        # Hooks were reloaded in the meantime
+        return
+    _cpu_hooks.pop(hook_key, None)
+
+    entry = _stacked_hooks.get(hook_key)
+    if entry is None:
+        # Removed by a reload in progress
+        return
+    previous, hooked = entry
+    owner_name, attr, _ = hook_key
+    owner = _resolve_owner(owner_name, _node_class_mappings)
+    if owner is None or _get_installed(owner, attr) is not hooked:
+        # Another hook was stacked on top; the completed profile passes calls through
+        return
+    _stacked_hooks.pop(hook_key, None)
+    setattr(owner, attr, previous)
+    console_print(f"""Hook removed (profile complete): {format_target(owner_name, attr)}""")
+
+
+# Hook types: {type: factory(hook_key, hook_name, hook) -> wrap(func) or None}
+_HOOK_TYPES = {
+    "suppress": _suppress_wrapper,
+    "memory": _memory_wrapper,
+    "cpu": _cpu_wrapper,
+}
+
+
+def _resolve_owner(owner_name: str, mappings: dict):
+    """Return the hooked object: a node class, or a module/class for "module:Qualified" targets."""
+    if ":" in owner_name:
+        return resolve_owner(owner_name)
+    return mappings.get(owner_name)
+
+
+def _get_installed(owner, attr: str):
+    """Return owner.attr as stored, keeping staticmethod/classmethod wrappers on classes."""
+    if inspect.isclass(owner):
+        return inspect.getattr_static(owner, attr)
+    return getattr(owner, attr)
+
+
+def _hooked_keys():
+    """Return the (owner_name, attr) of every installed hook, without duplicates."""
+    keys = dict.fromkeys(_hooked_methods)
+    for owner_name, attr, _ in _stacked_hooks:
+        keys[(owner_name, attr)] = None
+    return list(keys)
+
+
+def _install_hook(owner, owner_name: str, attr: str, hook: dict):
+    """Replace owner.attr with a hooked version and remember the original.
+
+    Profiling hooks wrap whatever owner.attr currently is, so they can be
+    stacked on top of a suppress hook of the same method.
+    """
+    hook_name = format_target(owner_name, attr)
+    hook_type = hook.get("type", "suppress")
+    make_wrapper = _HOOK_TYPES.get(hook_type)
+    if make_wrapper is None:
+        console_print(f"""Unknown hook type "{hook_type}": {hook_name}""")
+        return
+
+    stacked = hook_type in _STACKED_TYPES
+    hook_key = (owner_name, attr, hook_type) if stacked else (owner_name, attr)
+
+    # Skip if already hooked
+    if hook_key in (_stacked_hooks if stacked else _hooked_methods):
+        console_print(f"""Already hooked: {hook_name}""")
+        return
+
+    # Keep staticmethod/classmethod wrappers so they still bind the same way
+    original = _get_installed(owner, attr)
+
+    wrap = make_wrapper(hook_key, hook_name, hook)
+    if wrap is None:
+        return
+
+    if isinstance(original, (staticmethod, classmethod)):
+        hooked = type(original)(wrap(original.__func__))
+    else:
+        hooked = wrap(original)
+
+    if stacked:
+        _stacked_hooks[hook_key] = (original, hooked)
+    else:
+        _hooked_methods[hook_key] = original
+    setattr(owner, attr, hooked)
+    if hook_type == "suppress":
+        console_print(f"""Hook applied: {hook_name}""")
+    else:
+        console_print(f"""Hook applied ({hook_type}): {hook_name}""")
+
+
+def _apply_target_hook(hook: dict):
+    """Apply a "module.path:Qualified.name" hook, deferring it until the module is imported.
+
+    Target hooks are registered when this package is imported, so modules
+    imported later are patched before anyone can bind the hooked name.
+    A module that was already imported is patched in place: names bound
+    earlier with `from module import name` still refer to the original.
+    """
+    target = hook["target"]
+
+    # Skip disabled hooks
+    if not hook.get("enabled", True):
+        console_print(f"""Skipped (disabled): {target}""")
+        return
+
+    try:
+        owner_name, attr = parse_target(target)
+    except ValueError as e:
+        console_print(str(e))
+        return
+
+    module_name = owner_name.partition(":")[0]
+    if module_name not in sys.modules:
+        _lazy_import_hook.defer(module_name, hook)
+        console_print(f"""Hook deferred until import: {target}""")
+        return
+
+    owner = resolve_owner(owner_name)
+    if owner is None or not hasattr(owner, attr):
+        console_print(f"""Target not found: {target}""")
+        return
 
-    for key, value in mappings.items():
-        hook = hook_dict.get(key)
-        if hook is None:
+    _install_hook(owner, owner_name, attr, hook)
+
+
+def _on_module_imported(module_name: str):
+    """Apply hooks deferred until `module_name` was imported."""
+    for hook in _lazy_import_hook.pop(module_name):
+        _apply_target_hook(hook)
+
+
+# Resolves deferred target hooks when their module is first imported
+_lazy_import_hook = LazyImportHook(_on_module_imported)
+
+
+def _in_stacking_order(hooks: list):
+    """Return `hooks` with profiling hooks last, so they stack on top of suppress hooks."""
+    return sorted(hooks, key=lambda hook: hook.get("type", "suppress") in _STACKED_TYPES)
+
+
+def _apply_target_hooks(hooks: list):
+    """Apply the "target" hooks in `hooks`. Only enabled hooks are applied."""
+    for hook in _in_stacking_order(hooks):
+        if "target" in hook:
+            _apply_target_hook(hook)
+
+
+def _apply_node_hooks(mappings: dict, hooks: list):
+    """Apply the node hooks in `hooks` to nodes in `mappings`. Only enabled hooks are applied."""
+    for hook in _in_stacking_order(hooks):
+        if "target" in hook:
+            continue
+
+        node_class = mappings.get(hook.get("node"))
+        if node_class is None:
             continue
 
         # Skip disabled hooks
@@ -34,38 +320,41 @@ def _apply_hooks(mappings: dict):
             continue
 
         method_name = hook["method"]
-        if not hasattr(value, method_name):
+        if not hasattr(node_class, method_name):
             console_print(f"""Method not found: {hook["node"]}.{method_name}""")
             continue
 
-        hook_key = (key, method_name)
-
-        # Skip if already hooked
-        if hook_key in _hooked_methods:
-            console_print(f"""Already hooked: {hook["node"]}.{method_name}""")
-            continue
-
-        original_method = getattr(value, method_name)
-        _hooked_methods[hook_key] = original_method
-        console_print(f"""Hook applied: {hook["node"]}.{method_name}""")
+        _install_hook(node_class, hook["node"], method_name, hook)
 
-        def make_hooked_method(original):
-            def hooked_method(*args, **kwargs):
-                with redirect_stdout(open(os.devnull, 'w')):
-                    return original(*args, **kwargs)
-            return hooked_method
 
-        setattr(value, method_name, make_hooked_method(original_method))
+def _apply_hooks(mappings: dict):
+    """Apply hooks based on settings. Only enabled hooks are applied."""
+    hooks = load_hooks()
+    _apply_target_hooks(hooks)
+    _apply_node_hooks(mappings, hooks)
 
 
 def _restore_hooks(mappings: dict):
-    """Restore all applied hooks to their original methods."""
-    for (node_name, method_name), original_method in list(_hooked_methods.items()):
-        node_class = mappings.get(node_name)
-        if node_class is not None:
-            setattr(node_class, method_name, original_method)
-            console_print(f"""Hook removed: {node_name}.{method_name}""")
+    """Restore all applied hooks to their original methods and drop deferred ones."""
+    # Cleared first so cpu hooks completing meanwhile leave the restore to this function
+    _cpu_hooks.clear()
+
+    # Unwind stacked profiling hooks first, newest first
+    for (owner_name, attr, hook_type), (previous, _) in reversed(list(_stacked_hooks.items())):
+        owner = _resolve_owner(owner_name, mappings)
+        if owner is not None:
+            setattr(owner, attr, previous)
+            console_print(f"""Hook removed ({hook_type}): {format_target(owner_name, attr)}""")
+    _stacked_hooks.clear()
+
+    for (owner_name, attr), original_method in list(_hooked_methods.items()):
+        owner = _resolve_owner(owner_name, mappings)
+        if owner is not None:
+            setattr(owner, attr, original_method)
+            console_print(f"""Hook removed: {format_target(owner_name, attr)}""")
     _hooked_methods.clear()
+    _samplers.clear()
+    _lazy_import_hook.clear()
 
 
 def reload_hooks():
@@ -80,9 +369,13 @@ def on_load(mappings: dict):
     """Callback after custom nodes are loaded."""
     global _node_class_mappings
     _node_class_mappings = mappings
-    _apply_hooks(mappings)
+    catalog_version.invalidate()
+    # Target hooks were already applied when this package was imported
+    _apply_node_hooks(mappings, load_hooks())
 
 
+# Register target hooks before other custom nodes import their modules
+_apply_target_hooks(load_hooks())
 on_custom_nodes_loaded(on_load)
 
 
@@ -92,6 +385,11 @@ try:
     from server import PromptServer
 
     if hasattr(PromptServer, "instance"):
+        stats_stream.set_sender(
+            PromptServer.instance.send_sync,
+            lambda sid: sid in PromptServer.instance.sockets,
+        )
+
         @PromptServer.instance.routes.get("/remove-print/default-hooks")
         async def get_default_hooks(request):
             """Return default hook settings"""
@@ -124,7 +422,7 @@ try:
                 return web.json_response({
                     "status": "ok",
                     "hooks": load_hooks(),
-                    "hooked": list(_hooked_methods.keys())
+                    "hooked": _hooked_keys()
                 })
             except Exception as e:
                 return web.json_response({"status": "error", "message": str(e)}, status=500)
@@ -142,7 +440,30 @@ try:
             return web.json_response({
                 "status": "ok",
                 "hooks": load_hooks(),
-                "hooked": list(_hooked_methods.keys())
+                "hooked": _hooked_keys()
+            })
+
+        @PromptServer.instance.routes.post("/remove-print/stream")
+        async def set_stream_subscription(request):
+            """Subscribe or unsubscribe a websocket client to live hook stats"""
+            try:
+                data = await request.json()
+            except Exception:
+                return web.json_response({"status": "error", "message": "Invalid JSON"}, status=400)
+
+            client_id = data.get("client_id")
+            if not client_id:
+                return web.json_response({"status": "error", "message": "client_id is required"}, status=400)
+
+            if data.get("enabled", True):
+                stats_stream.subscribe(client_id)
+            else:
+                stats_stream.unsubscribe(client_id)
+
+            return web.json_response({
+                "status": "ok",
+                "subscribed": stats_stream.is_subscribed(client_id),
+                "interval": stats_stream.interval
             })
 
         @PromptServer.instance.routes.get("/remove-print/locales/{lang}")
@@ -170,11 +491,86 @@ try:
             except Exception as e:
                 return web.json_response({"error": str(e)}, status=500)
 
+        @PromptServer.instance.routes.get("/remove-print/stats")
+        async def get_stats(request):
+            """Return sampled/suppressed call counts of hooks with sampling enabled"""
+            stats = {
+                format_target(owner_name, attr): sampler.snapshot()
+                for (owner_name, attr), sampler in list(_samplers.items())
+            }
+            return web.json_response({"stats": stats})
+
+        @PromptServer.instance.routes.get("/remove-print/memory")
+        async def get_memory_profiles(request):
+            """Return per-call allocation stats and top allocation sites of "memory" hooks"""
+            profiles = {name: profile.snapshot() for name, profile in list(_memory_profiles.items())}
+            return web.json_response({"tracing": tracemalloc.is_tracing(), "profiles": profiles})
+
+        @PromptServer.instance.routes.delete("/remove-print/memory")
+        async def clear_memory_profiles(request):
+            """Discard collected memory profiles"""
+            _memory_profiles.clear()
+            reload_hooks()
+            return web.json_response({"status": "ok"})
+
+        @PromptServer.instance.routes.get("/remove-print/cpu")
+        async def get_cpu_profiles(request):
+            """Return progress and top functions (by cumulative time) of "cpu" hook profiles"""
+            try:
+                limit = int(request.query.get("limit", 20))
+            except ValueError:
+                return web.json_response({"error": "Invalid limit"}, status=400)
+            profiles = {name: profile.summary(limit) for name, profile in list(_cpu_profiles.items())}
+            return web.json_response({"profiles": profiles})
+
+        @PromptServer.instance.routes.get("/remove-print/cpu/pstats")
+        async def download_cpu_profile(request):
+            """Return the aggregated stats of a "cpu" hook as a .pstats file (?hook=Node.method)"""
+            hook_name = request.query.get("hook", "")
+            profile = _cpu_profiles.get(hook_name)
+            if profile is None:
+                return web.json_response({"error": "Profile not found"}, status=404)
+
+            filename = re.sub(r"[^A-Za-z0-9_.-]", "_", hook_name) + ".pstats"
+            return web.Response(
+                body=profile.dump(),
+                content_type="application/octet-stream",
+                headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+            )
+
+        @PromptServer.instance.routes.delete("/remove-print/cpu")
+        async def clear_cpu_profiles(request):
+            """Discard CPU profiles (all, or ?hook=Node.method) so their hooks can run again"""
+            hook_name = request.query.get("hook")
+            if hook_name is None:
+                _cpu_profiles.clear()
+            else:
+                _cpu_profiles.pop(hook_name, None)
+            reload_hooks()
+            return web.json_response({
+                "status": "ok",
+                "hooked": _hooked_keys()
+            })
+
+        @PromptServer.instance.routes.get("/remove-print/catalog-version")
+        async def get_catalog_version(request):
+            """Return the catalog version hash (changes with the node list or locale files)"""
+            return web.json_response({"version": catalog_version.get(_node_class_mappings)})
+
+        @PromptServer.instance.routes.get("/remove-print/catalog")
+        async def get_catalog(request):
+            """Return node list and all locales in one response, tagged with the catalog version"""
+            return web.json_response({
+                "version": catalog_version.get(_node_class_mappings),
+                "nodes": sorted(_node_class_mappings.keys()),
+                "locales": catalog_version.load_locales()
+            })
+
         @PromptServer.instance.routes.get("/remove-print/nodes")
         async def get_nodes(request):
             """Return list of registered nodes"""
             nodes = sorted(_node_class_mappings.keys())
-            return web.json_response({"nodes": nodes})
+            return web.json_response({"nodes": nodes, "version": catalog_version.get(_node_class_mappings)})
 
         @PromptServer.instance.routes.get("/remove-print/methods/{node_name}")
         async def get_methods(request):
@@ -184,14 +580,7 @@ try:
             if node_class is None:
                 return web.json_response({"methods": []}, status=404)
 
-            import inspect
-            methods = []
-            for name, method in inspect.getmembers(node_class, predicate=inspect.isfunction):
-                # Exclude dunder methods
-                if not name.startswith("_"):
-                    methods.append(name)
-            methods.sort()
-            return web.json_response({"methods": methods})
+            return web.json_response({"methods": public_methods(node_class)})
 
 except ImportError:
     console_print("PromptServer not available, API endpoints disabled.")
@@ -0,0 +1,93 @@
+import glob
+import hashlib
+import inspect
+import json
+import os
+
+
+class CatalogVersion:
+    """Version hash of the node catalog and locale files served to the settings UI.
+
+    The hash covers node names with their class's module/qualname and
+    public method names (the lists the UI caches per node), and the
+    contents of every locales/<lang>/main.json. Node changes must be
+    reported with invalidate(); locale files are re-hashed only when their
+    mtime or size changes.
+    """
+
+    def __init__(self, locales_dir):
+        self.locales_dir = locales_dir
+        self._nodes_digest = None
+        self._locale_stamp = None
+        self._locale_digest = None
+
+    def invalidate(self):
+        self._nodes_digest = None
+
+    def get(self, mappings: dict):
+        if self._nodes_digest is None:
+            self._nodes_digest = _hash_nodes(mappings)
+
+        stamp = self._stamp_locales()
+        if stamp != self._locale_stamp:
+            self._locale_digest = _hash_files([path for path, _, _ in stamp])
+            self._locale_stamp = stamp
+
+        return hashlib.sha1((self._nodes_digest + self._locale_digest).encode()).hexdigest()[:16]
+
+    def locale_paths(self):
+        return sorted(glob.glob(os.path.join(self.locales_dir, "*", "main.json")))
+
+    def load_locales(self):
+        """Return {lang: messages} for every locale directory."""
+        locales = {}
+        for path in self.locale_paths():
+            lang = os.path.basename(os.path.dirname(path))
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    locales[lang] = json.load(f)
+            except (OSError, json.JSONDecodeError):
+                continue
+        return locales
+
+    def _stamp_locales(self):
+        stamp = []
+        for path in self.locale_paths():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            stamp.append((path, st.st_mtime_ns, st.st_size))
+        return tuple(stamp)
+
+
+def public_methods(node_class):
+    """Return the sorted names of a node class's functions, excluding _private and dunder ones."""
+    methods = []
+    for name, _ in inspect.getmembers(node_class, predicate=inspect.isfunction):
+        if not name.startswith("_"):
+            methods.append(name)
+    return methods
+
+
+def _hash_nodes(mappings: dict):
+    h = hashlib.sha1()
+    for name in sorted(mappings):
+        node_class = mappings[name]
+        module = getattr(node_class, "__module__", "")
+        qualname = getattr(node_class, "__qualname__", "")
+        methods = ",".join(public_methods(node_class))
+        h.update(f"{name}={module}.{qualname}:{methods}\n".encode("utf-8", "surrogatepass"))
+    return h.hexdigest()
+
+
+def _hash_files(paths):
+    h = hashlib.sha1()
+    for path in paths:
+        h.update(os.path.basename(os.path.dirname(path)).encode())
+        try:
+            with open(path, "rb") as f:
+                h.update(f.read())
+        except OSError:
+            continue
+    return h.hexdigest()
@@ -0,0 +1,110 @@
+import re
+
+try:
+    from re import _parser as _sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse as _sre_parse
+
+# Leading inline flags such as "(?i)"; only allowed at the start of the combined regex
+_GLOBAL_FLAGS = re.compile(r"\(\?([aiLmsux]+)\)")
+
+
+class LineFilter:
+    """Keep/drop decision for output lines of a hook.
+
+    All of a hook's "keep" and "drop" patterns are compiled into a single
+    regex. A line matching a keep pattern is kept, a line matching a drop
+    pattern is dropped (keep wins if both match). Unmatched lines are dropped
+    when there are keep patterns and kept when there are only drop patterns.
+    Patterns are searched anywhere in the line, like re.search().
+
+    Leading inline flags ("(?i)debug") apply to their own pattern only.
+    Backreferences and conditional groups are not supported, and group
+    names must be unique across a hook's patterns.
+    """
+
+    def __init__(self, keep=(), drop=()):
+        group_names = set()
+        keep = [_prepare(pattern, group_names) for pattern in keep]
+        drop = [_prepare(pattern, group_names) for pattern in drop]
+        branches = []
+        if keep:
+            branches.append(f"(?P<keep>{_alternation(keep)})")
+        if drop:
+            branches.append(f"(?P<drop>{_alternation(drop)})")
+        self.pattern = re.compile("|".join(branches))
+        self.has_keep = bool(keep)
+        self.keep_unmatched = not keep
+
+    def keeps(self, line: str):
+        search = self.pattern.search
+        match = search(line)
+        while match is not None:
+            if match.lastgroup == "keep":
+                return True
+            if not self.has_keep:
+                return False
+            # A drop pattern matched first; a keep pattern may still match later
+            match = search(line, match.start() + 1)
+        return self.keep_unmatched
+
+
+def _prepare(pattern, group_names):
+    """Validate one pattern on its own and return it in a form that can be combined.
+
+    Raises re.error naming the pattern if it cannot be used.
+    """
+    try:
+        compiled = re.compile(pattern)
+    except re.error as e:
+        raise re.error(f"{e} in pattern {pattern!r}") from None
+
+    # Group numbers shift once patterns are combined
+    if _has_group_reference(_sre_parse.parse(pattern)):
+        raise re.error(f"backreferences are not supported in pattern {pattern!r}")
+    for name in compiled.groupindex:
+        if name in ("keep", "drop") or name in group_names:
+            raise re.error(f"group name {name!r} is reserved or already used in pattern {pattern!r}")
+        group_names.add(name)
+
+    flags = ""
+    rest = pattern
+    match = _GLOBAL_FLAGS.match(rest)
+    while match is not None:
+        flags += match.group(1)
+        rest = rest[match.end():]
+        match = _GLOBAL_FLAGS.match(rest)
+    if not flags:
+        return pattern
+    # Scope the flags to this pattern; in verbose mode a trailing comment must not eat the ")"
+    return f"(?{flags}:{rest}\n)" if "x" in flags else f"(?{flags}:{rest})"
+
+
+def _has_group_reference(value):
+    """Return True if a parsed pattern refers back to a group ("\\1", "(?P=name)", "(?(1)...)")."""
+    if isinstance(value, _sre_parse.SubPattern):
+        for op, av in value:
+            if op in (_sre_parse.GROUPREF, _sre_parse.GROUPREF_EXISTS) or _has_group_reference(av):
+                return True
+    elif isinstance(value, (tuple, list)):
+        return any(_has_group_reference(item) for item in value)
+    return False
+
+
+def _alternation(patterns):
+    return "(?:" + "|".join(f"(?:{pattern})" for pattern in patterns) + ")"
+
+
+def make_line_filter(hook: dict):
+    """Build a LineFilter from a hook's "keep"/"drop" pattern lists, or None if unset.
+
+    Raises re.error for invalid patterns and TypeError for non-list values.
+    """
+    keep = hook.get("keep") or []
+    drop = hook.get("drop") or []
+    if not keep and not drop:
+        return None
+    for patterns in (keep, drop):
+        if not isinstance(patterns, list) or not all(isinstance(p, str) for p in patterns):
+            raise TypeError("keep and drop must be lists of strings")
+    return LineFilter(keep, drop)
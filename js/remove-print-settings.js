@@ -1,6 +1,13 @@
 import { app } from "../../scripts/app.js";
+import { api } from "../../scripts/api.js";
 
 const EXTENSION_NAME = "comfyui-remove-print";
+const STATS_EVENT = "remove-print.stats";
+const LIVE_MAX_LINES = 50;
+const CATALOG_CACHE_PREFIX = `${EXTENSION_NAME}.catalog.`;
+const PICKER_ROW_HEIGHT = 28;
+const PICKER_HEIGHT = 240;
+const PICKER_OVERSCAN = 5;
 
 /** @type {Record<string, Record<string, string>>} */
 let MESSAGES = { en: {}, ja: {} };
@@ -23,20 +30,194 @@ function t(key, params = {}) {
 }
 
 /**
- * 翻訳データをロードする
+ * ノード一覧・翻訳のカタログ（サーバーのカタログバージョンごとにキャッシュ）
+ * @type {{ version: string, nodes: string[], locales: Record<string, Record<string, string>> } | null}
  */
-async function loadTranslations() {
+let catalog = null;
+
+/** @type {Record<string, string[]>} ノードごとのメソッド一覧（catalog と同じバージョン） */
+let catalogMethods = {};
+
+function readCache(key) {
     try {
-        const [enResp, jaResp] = await Promise.all([
-            fetch("/remove-print/locales/en"),
-            fetch("/remove-print/locales/ja")
-        ]);
+        const raw = localStorage.getItem(key);
+        return raw ? JSON.parse(raw) : null;
+    } catch {
+        return null;
+    }
+}
 
-        MESSAGES.en = await enResp.json();
-        MESSAGES.ja = await jaResp.json();
+function writeCache(key, value) {
+    try {
+        localStorage.setItem(key, JSON.stringify(value));
     } catch (e) {
-        console.error(`[${EXTENSION_NAME}] Failed to load translations:`, e);
+        // 容量超過などの場合はキャッシュなしで続行
+        console.warn(`[${EXTENSION_NAME}] Failed to write catalog cache:`, e);
+    }
+}
+
+/**
+ * 現在のバージョン以外のカタログキャッシュを削除
+ */
+function purgeCatalogCache(version) {
+    try {
+        for (let i = localStorage.length - 1; i >= 0; i--) {
+            const key = localStorage.key(i);
+            if (key?.startsWith(CATALOG_CACHE_PREFIX) && !key.startsWith(CATALOG_CACHE_PREFIX + version)) {
+                localStorage.removeItem(key);
+            }
+        }
+    } catch {
+        // localStorage が使えない環境では何もしない
+    }
+}
+
+/**
+ * カタログ（ノード一覧・翻訳）をロードする
+ * バージョンが変わっていなければブラウザのキャッシュを使い、小さなリクエスト1回で再検証する
+ */
+async function loadCatalog() {
+    try {
+        const { version } = await (await fetch("/remove-print/catalog-version")).json();
+        if (catalog?.version !== version) {
+            catalog = readCache(CATALOG_CACHE_PREFIX + version);
+            catalogMethods = readCache(`${CATALOG_CACHE_PREFIX}${version}.methods`) || {};
+        }
+
+        if (!catalog) {
+            catalog = await (await fetch("/remove-print/catalog")).json();
+            catalogMethods = {};
+            purgeCatalogCache(catalog.version);
+            writeCache(CATALOG_CACHE_PREFIX + catalog.version, catalog);
+        }
+
+        MESSAGES = { ...MESSAGES, ...catalog.locales };
+    } catch (e) {
+        console.error(`[${EXTENSION_NAME}] Failed to load catalog:`, e);
+    }
+}
+
+/**
+ * ノードのメソッド一覧を取得（カタログバージョン単位でキャッシュ）
+ * @param {string} nodeName
+ * @returns {Promise<string[]>}
+ */
+async function getMethods(nodeName) {
+    if (catalogMethods[nodeName]) return catalogMethods[nodeName];
+
+    const resp = await fetch(`/remove-print/methods/${encodeURIComponent(nodeName)}`);
+    const { methods } = await resp.json();
+    if (resp.ok && catalog) {
+        catalogMethods[nodeName] = methods;
+        writeCache(`${CATALOG_CACHE_PREFIX}${catalog.version}.methods`, catalogMethods);
+    }
+    return methods;
+}
+
+/**
+ * 表示中の行だけを描画する候補リスト（数千件のノードでも軽量）
+ * @param {HTMLInputElement} input
+ * @param {() => string[]} getItems
+ * @param {(value: string) => void} onSelect
+ * @returns {HTMLDivElement} input を含むラッパー要素
+ */
+function createVirtualPicker(input, getItems, onSelect) {
+    const wrapper = document.createElement("div");
+    wrapper.style.cssText = "position: relative; flex: 1; display: flex;";
+
+    const list = document.createElement("div");
+    list.style.cssText = `
+    position: absolute; top: 100%; left: 0; right: 0; margin-top: 4px;
+    max-height: ${PICKER_HEIGHT}px; overflow-y: auto; display: none; z-index: 1;
+    background: #333; border: 1px solid #555; border-radius: 6px;
+  `;
+    const spacer = document.createElement("div");
+    spacer.style.position = "relative";
+    list.appendChild(spacer);
+
+    input.style.flex = "1";
+    wrapper.appendChild(input);
+    wrapper.appendChild(list);
+
+    let filtered = [];
+    let active = -1;
+
+    function render() {
+        const first = Math.max(0, Math.floor(list.scrollTop / PICKER_ROW_HEIGHT) - PICKER_OVERSCAN);
+        const last = Math.min(
+            filtered.length,
+            Math.ceil((list.scrollTop + PICKER_HEIGHT) / PICKER_ROW_HEIGHT) + PICKER_OVERSCAN
+        );
+
+        spacer.replaceChildren();
+        for (let i = first; i < last; i++) {
+            const row = document.createElement("div");
+            row.textContent = filtered[i];
+            row.style.cssText = `
+        position: absolute; top: ${i * PICKER_ROW_HEIGHT}px; left: 0; right: 0;
+        height: ${PICKER_ROW_HEIGHT}px; line-height: ${PICKER_ROW_HEIGHT}px; padding: 0 12px;
+        font-size: 13px; cursor: pointer; white-space: nowrap; overflow: hidden;
+        text-overflow: ellipsis; background: ${i === active ? "#1a73e8" : "transparent"};
+      `;
+            // blur より先に選択する
+            row.onmousedown = (e) => {
+                e.preventDefault();
+                select(filtered[i]);
+            };
+            spacer.appendChild(row);
+        }
+    }
+
+    function open() {
+        const query = input.value.trim().toLowerCase();
+        const items = getItems();
+        filtered = query ? items.filter((name) => name.toLowerCase().includes(query)) : items;
+        active = -1;
+        spacer.style.height = `${filtered.length * PICKER_ROW_HEIGHT}px`;
+        list.style.display = filtered.length > 0 ? "block" : "none";
+        list.scrollTop = 0;
+        render();
     }
+
+    function close() {
+        list.style.display = "none";
+    }
+
+    function select(value) {
+        input.value = value;
+        close();
+        onSelect(value);
+    }
+
+    list.addEventListener("scroll", render);
+    input.addEventListener("focus", open);
+    input.addEventListener("input", open);
+    input.addEventListener("blur", close);
+    input.addEventListener("keydown", (e) => {
+        if (list.style.display === "none") return;
+
+        if (e.key === "ArrowDown" || e.key === "ArrowUp") {
+            e.preventDefault();
+            const step = e.key === "ArrowDown" ? 1 : -1;
+            active = Math.max(0, Math.min(filtered.length - 1, active + step));
+
+            // 選択行が見えるようにスクロール
+            const top = active * PICKER_ROW_HEIGHT;
+            if (top < list.scrollTop) {
+                list.scrollTop = top;
+            } else if (top + PICKER_ROW_HEIGHT > list.scrollTop + PICKER_HEIGHT) {
+                list.scrollTop = top + PICKER_ROW_HEIGHT - PICKER_HEIGHT;
+            }
+            render();
+        } else if (e.key === "Enter" && active >= 0) {
+            e.preventDefault();
+            select(filtered[active]);
+        } else if (e.key === "Escape") {
+            close();
+        }
+    });
+
+    return wrapper;
 }
 
 /**
@@ -86,7 +267,27 @@ async function resetToDefault() {
     return resp.json();
 }
 
+/**
+ * フックの表示名（"module.path:Qualified.name" 形式のターゲットはそのまま）
+ */
+function hookLabel(hook) {
+    return hook.target || `${hook.node}.${hook.method}`;
+}
 
+/**
+ * フック統計のライブ配信を購読/解除
+ */
+async function setStatsSubscription(enabled) {
+    try {
+        await fetch("/remove-print/stream", {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ client_id: api.clientId, enabled }),
+        });
+    } catch (e) {
+        console.error(`[${EXTENSION_NAME}] Failed to update stats subscription:`, e);
+    }
+}
 
 /**
  * モーダルダイアログを作成して表示
@@ -94,7 +295,10 @@ async function resetToDefault() {
 function showSettingsDialog() {
     // 既存のモーダルがあれば削除
     const existing = document.getElementById("remove-print-modal");
-    if (existing) existing.remove();
+    if (existing) {
+        existing.detachStats?.();
+        existing.remove();
+    }
 
     // オーバーレイ
     const overlay = document.createElement("div");
@@ -131,7 +335,7 @@ function showSettingsDialog() {
     background: none; border: none; color: #aaa; font-size: 20px;
     cursor: pointer; padding: 4px 8px;
   `;
-    closeBtn.onclick = () => overlay.remove();
+    closeBtn.onclick = () => closeDialog();
     header.appendChild(closeBtn);
 
     // 注意メッセージ
@@ -146,19 +350,28 @@ function showSettingsDialog() {
     const listContainer = document.createElement("div");
     listContainer.id = "remove-print-hook-list";
 
+    // ライブ出力（購読中に捕捉された行）
+    const liveTitle = document.createElement("div");
+    liveTitle.style.cssText = "margin-top: 16px; font-size: 13px; color: #aaa;";
+    liveTitle.textContent = t("modal.liveTitle");
+
+    const liveOutput = document.createElement("pre");
+    liveOutput.style.cssText = `
+    margin: 6px 0 0; padding: 8px 12px; background: #1e1e1e; border-radius: 6px;
+    max-height: 160px; overflow-y: auto; font-size: 12px; color: #bbb;
+    white-space: pre-wrap; word-break: break-all;
+  `;
+    liveOutput.textContent = t("modal.liveEmpty");
+
     // 新規追加フォーム
     const addForm = document.createElement("div");
     addForm.style.cssText = `
     display: flex; gap: 8px; margin-top: 16px; align-items: center;
   `;
 
-    // ノード入力 + datalist
-    const nodeDatalist = document.createElement("datalist");
-    nodeDatalist.id = "remove-print-node-list";
-
+    // ノード入力 + 仮想スクロールの候補リスト
     const nodeInput = document.createElement("input");
     nodeInput.placeholder = t("modal.nodePlaceholder");
-    nodeInput.setAttribute("list", "remove-print-node-list");
     nodeInput.style.cssText = `
     flex: 1; padding: 8px 12px; background: #333; border: 1px solid #555;
     border-radius: 6px; color: #eee; font-size: 14px;
@@ -180,25 +393,13 @@ function showSettingsDialog() {
     color: #fff; cursor: pointer; font-size: 14px; white-space: nowrap;
   `;
 
-    addForm.appendChild(nodeInput);
-    addForm.appendChild(nodeDatalist);
+    const nodePicker = createVirtualPicker(nodeInput, () => catalog?.nodes || [], () => fetchMethods());
+
+    addForm.appendChild(nodePicker);
     addForm.appendChild(methodInput);
     addForm.appendChild(methodDatalist);
     addForm.appendChild(addBtn);
 
-    // ノード一覧をAPIから取得してdatalistに設定
-    fetch("/remove-print/nodes")
-        .then((r) => r.json())
-        .then(({ nodes }) => {
-            nodeDatalist.innerHTML = "";
-            nodes.forEach((name) => {
-                const opt = document.createElement("option");
-                opt.value = name;
-                nodeDatalist.appendChild(opt);
-            });
-        })
-        .catch(() => { });
-
     // ノード選択時にメソッド候補を動的取得
     let lastFetchedNode = "";
     nodeInput.addEventListener("change", fetchMethods);
@@ -206,12 +407,12 @@ function showSettingsDialog() {
 
     function fetchMethods() {
         const nodeName = nodeInput.value.trim();
-        if (!nodeName || nodeName === lastFetchedNode) return;
+        // "module.path:Qualified.name" 形式のターゲットにはメソッド候補がない
+        if (!nodeName || nodeName.includes(":") || nodeName === lastFetchedNode) return;
         lastFetchedNode = nodeName;
 
-        fetch(`/remove-print/methods/${encodeURIComponent(nodeName)}`)
-            .then((r) => r.json())
-            .then(({ methods }) => {
+        getMethods(nodeName)
+            .then((methods) => {
                 methodDatalist.innerHTML = "";
                 methods.forEach((name) => {
                     const opt = document.createElement("option");
@@ -255,15 +456,52 @@ function showSettingsDialog() {
     modal.appendChild(notice);
     modal.appendChild(listContainer);
     modal.appendChild(addForm);
+    modal.appendChild(liveTitle);
+    modal.appendChild(liveOutput);
     modal.appendChild(footer);
     overlay.appendChild(modal);
     document.body.appendChild(overlay);
 
     // オーバーレイクリックで閉じる
     overlay.addEventListener("click", (e) => {
-        if (e.target === overlay) overlay.remove();
+        if (e.target === overlay) closeDialog();
     });
 
+    // --- ライブ統計 ---
+    /** @type {Record<string, number>} ダイアログを開いてからの呼び出し回数 */
+    const liveCalls = {};
+    const liveLines = [];
+
+    function onStats({ detail }) {
+        for (const [hookName, counter] of Object.entries(detail.hooks || {})) {
+            liveCalls[hookName] = (liveCalls[hookName] || 0) + counter.calls;
+            const badge = listContainer.querySelector(`[data-hook="${CSS.escape(hookName)}"]`);
+            if (badge) badge.textContent = t("modal.liveCalls", { count: liveCalls[hookName] });
+        }
+
+        for (const line of detail.lines || []) {
+            liveLines.push(`[${line.hook}] ${line.text}`);
+        }
+        if (detail.dropped) {
+            liveLines.push(t("modal.liveDropped", { count: detail.dropped }));
+        }
+        if (liveLines.length > 0) {
+            liveLines.splice(0, Math.max(0, liveLines.length - LIVE_MAX_LINES));
+            liveOutput.textContent = liveLines.join("\n");
+            liveOutput.scrollTop = liveOutput.scrollHeight;
+        }
+    }
+
+    api.addEventListener(STATS_EVENT, onStats);
+    setStatsSubscription(true);
+    overlay.detachStats = () => api.removeEventListener(STATS_EVENT, onStats);
+
+    function closeDialog() {
+        overlay.detachStats();
+        setStatsSubscription(false);
+        overlay.remove();
+    }
+
     // --- データ管理 ---
     let currentHooks = [];
 
@@ -305,7 +543,16 @@ function showSettingsDialog() {
         flex: 1; font-family: monospace; font-size: 14px;
         color: ${hook.enabled !== false ? "#eee" : "#888"};
       `;
-            label.textContent = `${hook.node}.${hook.method}`;
+            label.textContent = hookLabel(hook);
+
+            // ライブ呼び出し回数
+            const hookName = hookLabel(hook);
+            const badge = document.createElement("span");
+            badge.dataset.hook = hookName;
+            badge.style.cssText = "font-size: 12px; color: #8ab4f8; white-space: nowrap;";
+            if (liveCalls[hookName]) {
+                badge.textContent = t("modal.liveCalls", { count: liveCalls[hookName] });
+            }
 
             // 削除ボタン
             const delBtn = document.createElement("button");
@@ -324,6 +571,7 @@ function showSettingsDialog() {
 
             item.appendChild(toggle);
             item.appendChild(label);
+            item.appendChild(badge);
             item.appendChild(delBtn);
             listContainer.appendChild(item);
         });
@@ -339,18 +587,25 @@ function showSettingsDialog() {
     addBtn.onclick = () => {
         const node = nodeInput.value.trim();
         const method = methodInput.value.trim();
-        if (!node || !method) {
+
+        // "module.path:Qualified.name" はモジュール関数/ライブラリ関数のターゲット
+        let newHook;
+        if (node.includes(":")) {
+            newHook = { target: method ? `${node}.${method}` : node, enabled: true };
+        } else if (node && method) {
+            newHook = { node, method, enabled: true };
+        } else {
             alert(t("modal.inputRequired"));
             return;
         }
 
         // 重複チェック
-        if (currentHooks.some((h) => h.node === node && h.method === method)) {
+        if (currentHooks.some((h) => hookLabel(h) === hookLabel(newHook))) {
             alert(t("modal.duplicateHook"));
             return;
         }
 
-        currentHooks.push({ node, method, enabled: true });
+        currentHooks.push(newHook);
         nodeInput.value = "";
         methodInput.value = "";
         renderHookList();
@@ -413,7 +668,7 @@ function showSettingsDialog() {
 app.registerExtension({
     name: `${EXTENSION_NAME}.settings`,
     async setup() {
-        await loadTranslations();
+        await loadCatalog();
         // Settings パネルに「Remove Print フック設定」エントリを追加
         app.ui.settings.addSetting({
             id: "ComfyuiRemovePrint.Hooks",
@@ -433,7 +688,7 @@ app.registerExtension({
                 `;
                 editBtn.onclick = async (e) => {
                     e.preventDefault();
-                    await loadTranslations(); // Ensure translations are fresh
+                    await loadCatalog(); // Revalidate cached catalog
                     showSettingsDialog();
                 };
                 return editBtn;
@@ -0,0 +1,264 @@
+import cProfile
+import marshal
+import os
+import pstats
+import threading
+import tracemalloc
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Number of profiled calls in progress; tracemalloc only runs while this is > 0
+_tracemalloc_users = 0
+_tracemalloc_started = False
+_tracemalloc_lock = threading.Lock()
+
+# Peak marks of profiled calls in progress; raised before every reset_peak()
+_active_peaks = []
+
+# Frames excluded from allocation sites
+_SITE_FILTERS = [
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, __file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<unknown>"),
+]
+
+
+def start_tracemalloc():
+    """Join the tracing session of profiled calls, starting tracemalloc unless something else already traces.
+
+    Returns True if this call started the session.
+    """
+    global _tracemalloc_users, _tracemalloc_started
+    with _tracemalloc_lock:
+        started = _tracemalloc_users == 0 and not tracemalloc.is_tracing()
+        if started:
+            tracemalloc.start()
+            _tracemalloc_started = True
+        _tracemalloc_users += 1
+        return started
+
+
+def stop_tracemalloc():
+    """Leave the tracing session; stops tracemalloc if it was started by start_tracemalloc()."""
+    global _tracemalloc_users, _tracemalloc_started
+    with _tracemalloc_lock:
+        _tracemalloc_users = max(0, _tracemalloc_users - 1)
+        if _tracemalloc_users == 0 and _tracemalloc_started:
+            tracemalloc.stop()
+            _tracemalloc_started = False
+
+
+class _PeakMark:
+    """Highest traced memory seen before a reset_peak() during one profiled call."""
+
+    __slots__ = ("peak",)
+
+    def __init__(self):
+        self.peak = 0
+
+
+def _reset_peak():
+    """Call tracemalloc.reset_peak(), first folding the current peak into every call in progress."""
+    with _tracemalloc_lock:
+        _, peak = tracemalloc.get_traced_memory()
+        for mark in _active_peaks:
+            mark.peak = max(mark.peak, peak)
+        tracemalloc.reset_peak()
+
+
+def current_rss():
+    """Return the resident set size of this process in bytes, or None if unavailable."""
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+class MemoryProfile:
+    """Per-call Python allocation and RSS statistics of one hooked method.
+
+    tracemalloc runs only while profiled calls are in progress; concurrent
+    or nested calls share one session. A call that starts the session takes
+    a single snapshot at exit, since everything traced then was allocated
+    during the call. Calls joining a running session compare snapshots
+    from entry and exit instead and reset the peak, first folding it into
+    the peaks of the enclosing calls. Peak and net are relative to the
+    traced memory at call entry. Allocation sites are aggregated over all calls
+    and trimmed to the largest `max_sites`.
+    """
+
+    def __init__(self, top=10, max_sites=50):
+        self.top = top
+        self.max_sites = max_sites
+        self.calls = 0
+        self.peak_max = 0
+        self.peak_total = 0
+        self.net_total = 0
+        self.rss_delta_total = 0
+        self.last = None
+        self._sites = {}
+        self._lock = threading.Lock()
+
+    def run(self, original, args, kwargs):
+        rss_before = current_rss()
+        started = start_tracemalloc()
+        try:
+            snapshot_before = None
+            if not started:
+                snapshot_before = tracemalloc.take_snapshot().filter_traces(_SITE_FILTERS)
+                _reset_peak()
+            mark = _PeakMark()
+            with _tracemalloc_lock:
+                traced_before, _ = tracemalloc.get_traced_memory()
+                _active_peaks.append(mark)
+            try:
+                return original(*args, **kwargs)
+            finally:
+                with _tracemalloc_lock:
+                    _active_peaks.remove(mark)
+                    traced_after, traced_peak = tracemalloc.get_traced_memory()
+                traced_peak = max(traced_peak, mark.peak)
+                snapshot_after = tracemalloc.take_snapshot().filter_traces(_SITE_FILTERS)
+                rss_after = current_rss()
+                if snapshot_before is None:
+                    sites = [
+                        (stat.traceback[0], stat.size, stat.count)
+                        for stat in snapshot_after.statistics("lineno")[:self.top]
+                    ]
+                else:
+                    sites = [
+                        (stat.traceback[0], stat.size_diff, stat.count_diff)
+                        for stat in snapshot_after.compare_to(snapshot_before, "lineno")[:self.top]
+                    ]
+                self._record(
+                    peak=max(0, traced_peak - traced_before),
+                    net=traced_after - traced_before,
+                    rss_delta=None if rss_before is None or rss_after is None else rss_after - rss_before,
+                    sites=sites,
+                )
+        finally:
+            stop_tracemalloc()
+
+    def snapshot(self):
+        with self._lock:
+            sites = sorted(self._sites.items(), key=lambda item: item[1][0], reverse=True)
+            return {
+                "calls": self.calls,
+                "peak_max": self.peak_max,
+                "peak_avg": self.peak_total // self.calls if self.calls else 0,
+                "net_total": self.net_total,
+                "rss_delta_total": self.rss_delta_total,
+                "last": self.last,
+                "top": [
+                    {"site": site, "size_diff": size, "count_diff": count}
+                    for site, (size, count) in sites[:self.top]
+                ],
+            }
+
+    def _record(self, peak, net, rss_delta, sites):
+        with self._lock:
+            self.calls += 1
+            self.peak_max = max(self.peak_max, peak)
+            self.peak_total += peak
+            self.net_total += net
+            if rss_delta is not None:
+                self.rss_delta_total += rss_delta
+            self.last = {"peak": peak, "net": net, "rss_delta": rss_delta}
+
+            for frame, size_diff, count_diff in sites:
+                if size_diff <= 0:
+                    continue
+                site = f"{frame.filename}:{frame.lineno}"
+                totals = self._sites.setdefault(site, [0, 0])
+                totals[0] += size_diff
+                totals[1] += count_diff
+
+            if len(self._sites) > self.max_sites:
+                largest = sorted(self._sites.items(), key=lambda item: item[1][0], reverse=True)
+                self._sites = dict(largest[:self.max_sites])
+
+
+class CpuProfile:
+    """cProfile stats aggregated over the next `target_calls` calls of a hooked method.
+
+    Only one call is profiled at a time; concurrent or re-entrant calls run
+    unprofiled (the outer call's profile still covers re-entrant ones).
+    `on_complete` is called once, after the last profiled call returns.
+    """
+
+    def __init__(self, target_calls: int, on_complete=None):
+        self.target_calls = target_calls
+        self.on_complete = on_complete
+        self.calls = 0
+        self.skipped = 0
+        self._profiler = cProfile.Profile()
+        self._lock = threading.Lock()
+        self._stats = None
+
+    @property
+    def complete(self):
+        return self.calls >= self.target_calls
+
+    def run(self, original, args, kwargs):
+        if self.complete or not self._lock.acquire(blocking=False):
+            return original(*args, **kwargs)
+
+        finished = False
+        try:
+            try:
+                self._profiler.enable()
+            except ValueError:
+                # Another profiler is already active (only one is allowed on Python 3.12+)
+                self.skipped += 1
+                return original(*args, **kwargs)
+
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self._profiler.disable()
+                self.calls += 1
+                finished = self.complete
+                # Snapshot now so readers never wait for a profiled call
+                self._stats = pstats.Stats(self._profiler)
+        finally:
+            self._lock.release()
+            if finished and self.on_complete is not None:
+                self.on_complete()
+
+    def stats(self):
+        """Return the aggregated pstats.Stats, or None if no call was profiled yet."""
+        return self._stats
+
+    def dump(self):
+        """Return the stats in .pstats file format (as written by pstats.Stats.dump_stats)."""
+        stats = self.stats()
+        return marshal.dumps(stats.stats if stats is not None else {})
+
+    def summary(self, limit=20):
+        stats = self.stats()
+        top = []
+        if stats is not None:
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+            for func, (primitive_calls, ncalls, tottime, cumtime, _) in rows[:limit]:
+                top.append({
+                    "function": pstats.func_std_string(func),
+                    "ncalls": ncalls,
+                    "primitive_calls": primitive_calls,
+                    "tottime": tottime,
+                    "cumtime": cumtime,
+                })
+        return {
+            "calls": self.calls,
+            "target_calls": self.target_calls,
+            "complete": self.complete,
+            "skipped": self.skipped,
+            "total_time": stats.total_tt if stats is not None else 0.0,
+            "top": top,
+        }
@@ -0,0 +1,67 @@
+import itertools
+import time
+
+
+class Sampler:
+    """Decide which calls of a hook run unsuppressed.
+
+    A call is sampled if it is 1 in `every` calls, or if `interval` seconds
+    have passed since the last time-based sample. The call counter is an
+    itertools.count, so the hot path takes no lock; the reported counts are
+    best effort under concurrent calls.
+    """
+
+    def __init__(self, every: int = 0, interval: float = 0.0):
+        self.every = every
+        self.interval = interval
+        self.calls = 0
+        self.sampled = 0
+        self._counter = itertools.count()
+        self._next_sample_time = 0.0
+
+    def should_sample(self):
+        n = next(self._counter)
+        self.calls = n + 1
+
+        if self.every and n % self.every == 0:
+            self.sampled += 1
+            return True
+
+        if self.interval:
+            now = time.monotonic()
+            if now >= self._next_sample_time:
+                self._next_sample_time = now + self.interval
+                self.sampled += 1
+                return True
+
+        return False
+
+    @property
+    def suppressed(self):
+        return max(0, self.calls - self.sampled)
+
+    def snapshot(self):
+        return {
+            "every": self.every,
+            "interval": self.interval,
+            "calls": self.calls,
+            "sampled": self.sampled,
+            "suppressed": self.suppressed,
+        }
+
+
+def make_sampler(hook: dict):
+    """Build a Sampler from a hook's "sample_every"/"sample_interval", or None if unset.
+
+    Raises ValueError for values that are not positive numbers.
+    """
+    every = hook.get("sample_every") or 0
+    interval = hook.get("sample_interval") or 0
+    if not every and not interval:
+        return None
+
+    every = int(every)
+    interval = float(interval)
+    if every < 0 or interval < 0:
+        raise ValueError("sample_every and sample_interval must be positive")
+    return Sampler(every, interval)
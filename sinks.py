@@ -0,0 +1,177 @@
+import io
+import os
+import sys
+
+
+class _ReplacementStream(io.TextIOBase):
+    """Base for text streams that stand in for sys.stdout while a hooked method runs.
+
+    `encoding` and `errors` are taken from the replaced stream. Code that
+    bypasses text writes (`fileno()` for subprocesses, `buffer` for bytes)
+    gets os.devnull, so that output is discarded rather than raising.
+
+    Partial writes are collected in a list and joined once their line ends,
+    so output that rarely ends a line (e.g. progress bars redrawn with a
+    carriage return) costs linear time. With `max_pending`, writes to a
+    pending line are discarded once it holds that many characters.
+    """
+
+    def __init__(self, stream, max_pending=None):
+        super().__init__()
+        self._encoding = getattr(stream, "encoding", None) or "utf-8"
+        self._errors = getattr(stream, "errors", None) or "strict"
+        self._devnull = None
+        self._max_pending = max_pending
+        self._pending = []
+        self._pending_size = 0
+
+    @property
+    def encoding(self):
+        return self._encoding
+
+    @property
+    def errors(self):
+        return self._errors
+
+    @property
+    def buffer(self):
+        return self._open_devnull().buffer
+
+    def fileno(self):
+        return self._open_devnull().fileno()
+
+    def writable(self):
+        return True
+
+    def close(self):
+        if self._devnull is not None:
+            self._devnull.close()
+            self._devnull = None
+        super().close()
+
+    def _split_lines(self, s):
+        """Return the lines completed by `s`, or None; the trailing partial line is kept pending."""
+        if "\n" not in s:
+            if self._max_pending is None or self._pending_size < self._max_pending:
+                self._pending.append(s)
+                self._pending_size += len(s)
+            return None
+
+        lines = s.split("\n")
+        if self._pending:
+            self._pending.append(lines[0])
+            lines[0] = "".join(self._pending)
+        tail = lines.pop()
+        self._pending = [tail] if tail else []
+        self._pending_size = len(tail)
+        return lines
+
+    def _take_pending(self):
+        """Return the pending partial line ("" if none) and clear it."""
+        line = "".join(self._pending)
+        self._pending = []
+        self._pending_size = 0
+        return line
+
+    def _open_devnull(self):
+        if self._devnull is None:
+            self._devnull = open(os.devnull, "w", encoding=self._encoding, errors=self._errors)
+        return self._devnull
+
+
+class LineSink(_ReplacementStream):
+    """Text stream that buffers partial writes and passes each complete line to a callback.
+
+    A trailing line without a newline is passed on close(). `stream` is the
+    stdout being replaced (sys.stdout by default). Lines are only kept up to
+    about `max_length` characters when given.
+    """
+
+    def __init__(self, on_line, stream=None, max_length=None):
+        super().__init__(sys.stdout if stream is None else stream, max_pending=max_length)
+        self._on_line = on_line
+
+    def write(self, s):
+        if not s:
+            return 0
+        lines = self._split_lines(s)
+        if lines is not None:
+            for line in lines:
+                self._on_line(line)
+        return len(s)
+
+    def close(self):
+        if not self.closed:
+            line = self._take_pending()
+            if line:
+                self._on_line(line)
+        super().close()
+
+
+class LineFilterSink(_ReplacementStream):
+    """Text stream that writes the lines kept by a LineFilter to `target`.
+
+    Partial writes are buffered until a newline, and the kept lines of each
+    write are passed to `target` in a single write. Dropped lines are passed
+    to `on_drop` if given. A trailing line without a newline is tested on close().
+    Output written through `fileno()` or `buffer` is not filtered but discarded.
+    """
+
+    def __init__(self, line_filter, target, on_drop=None):
+        super().__init__(target)
+        self._has_keep = line_filter.has_keep
+        self._search = line_filter.pattern.search
+        self._keep_unmatched = line_filter.keep_unmatched
+        self._target = target
+        self._on_drop = on_drop
+
+    def write(self, s):
+        if not s:
+            return 0
+        lines = self._split_lines(s)
+        if lines is None:
+            return len(s)
+
+        kept = self._filter(lines)
+        if kept:
+            kept.append("")
+            self._target.write("\n".join(kept))
+        return len(s)
+
+    def flush(self):
+        self._target.flush()
+
+    def close(self):
+        if not self.closed:
+            line = self._take_pending()
+            if line and self._filter([line]):
+                self._target.write(line)
+        super().close()
+
+    def _filter(self, lines):
+        # Inlined LineFilter.keeps() for the common cases
+        search = self._search
+        keep_unmatched = self._keep_unmatched
+        has_keep = self._has_keep
+        on_drop = self._on_drop
+        kept = []
+        for line in lines:
+            m = search(line)
+            if m is None:
+                keep = keep_unmatched
+            elif m.lastgroup == "keep":
+                keep = True
+            else:
+                # A drop pattern matched first; a keep pattern may still match later
+                keep = False
+                while has_keep and m is not None:
+                    m = search(line, m.start() + 1)
+                    if m is not None and m.lastgroup == "keep":
+                        keep = True
+                        break
+
+            if keep:
+                kept.append(line)
+            elif on_drop is not None:
+                on_drop(line)
+        return kept
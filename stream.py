@@ -0,0 +1,118 @@
+import threading
+import time
+from collections import deque
+
+# Websocket event name used for pushed deltas
+EVENT_NAME = "remove-print.stats"
+
+
+class StatsStream:
+    """Coalesce per-hook counters and captured lines into rate-limited pushes.
+
+    Nothing is recorded while there are no subscribers, so hooks only pay for
+    a single truthiness check. Deltas are sent at most once per `interval`
+    seconds; captured lines beyond `max_lines` per interval are dropped and
+    counted instead of queued. Subscribers whose websocket is gone (closed or
+    reloaded tabs) are dropped on the next flush.
+    """
+
+    def __init__(self, interval=1.0, max_lines=200, max_line_length=1000):
+        self.interval = interval
+        self.max_lines = max_lines
+        self.max_line_length = max_line_length
+        self._send = None
+        self._is_connected = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._lines = deque()
+        self._dropped = 0
+        self._last_sent = time.monotonic()
+        self._timer = None
+
+    @property
+    def active(self):
+        return bool(self._subscribers) and self._send is not None
+
+    def set_sender(self, send, is_connected=None):
+        """Set the send function, called as send(event, data, sid).
+
+        `is_connected(sid)` reports whether a subscriber is still connected;
+        without it subscribers are only removed by unsubscribe().
+        """
+        self._send = send
+        self._is_connected = is_connected
+
+    def subscribe(self, client_id):
+        with self._lock:
+            self._subscribers.add(client_id)
+
+    def unsubscribe(self, client_id):
+        with self._lock:
+            self._subscribers.discard(client_id)
+            if not self._subscribers:
+                self._reset()
+
+    def is_subscribed(self, client_id):
+        return client_id in self._subscribers
+
+    def record_call(self, hook_name):
+        if not self._subscribers:
+            return
+        with self._lock:
+            self._counter(hook_name)["calls"] += 1
+            self._schedule()
+
+    def record_line(self, hook_name, line):
+        if not self._subscribers:
+            return
+        with self._lock:
+            self._counter(hook_name)["lines"] += 1
+            if len(self._lines) >= self.max_lines:
+                self._dropped += 1
+            else:
+                self._lines.append({"hook": hook_name, "text": line[:self.max_line_length]})
+            self._schedule()
+
+    def flush(self):
+        """Send the pending delta to every subscriber."""
+        with self._lock:
+            self._timer = None
+            self._last_sent = time.monotonic()
+            if not self._counters and not self._lines and not self._dropped:
+                return
+            payload = {
+                "hooks": self._counters,
+                "lines": list(self._lines),
+                "dropped": self._dropped,
+            }
+            if self._is_connected is not None:
+                self._subscribers = {sid for sid in self._subscribers if self._is_connected(sid)}
+            subscribers = list(self._subscribers)
+            self._reset()
+
+        send = self._send
+        if send is None:
+            return
+        for client_id in subscribers:
+            send(EVENT_NAME, payload, client_id)
+
+    def _counter(self, hook_name):
+        counter = self._counters.get(hook_name)
+        if counter is None:
+            counter = self._counters[hook_name] = {"calls": 0, "lines": 0}
+        return counter
+
+    def _schedule(self):
+        # Called with the lock held: at most one pending flush at a time
+        if self._timer is not None:
+            return
+        delay = max(0.0, self._last_sent + self.interval - time.monotonic())
+        self._timer = threading.Timer(delay, self.flush)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _reset(self):
+        self._counters = {}
+        self._lines.clear()
+        self._dropped = 0
@@ -0,0 +1,102 @@
+import sys
+
+
+def parse_target(target: str):
+    """Split "module.path:Qualified.name" into (owner_name, attribute_name).
+
+    The owner name keeps the "module.path:" prefix, so module-level functions
+    have an owner name ending with ":" (e.g. "pkg.mod:" for "pkg.mod:func").
+    """
+    module_name, sep, qualname = target.partition(":")
+    if not sep or not module_name or not qualname or qualname.endswith("."):
+        raise ValueError(f"Invalid target: {target}")
+    owner_qualname, _, attr = qualname.rpartition(".")
+    return f"{module_name}:{owner_qualname}", attr
+
+
+def format_target(owner_name: str, attr: str):
+    """Inverse of parse_target()."""
+    if owner_name.endswith(":"):
+        return owner_name + attr
+    return f"{owner_name}.{attr}"
+
+
+def resolve_owner(owner_name: str):
+    """Return the object named by an owner name, or None if its module is not imported."""
+    module_name, _, qualname = owner_name.partition(":")
+    obj = sys.modules.get(module_name)
+    for part in qualname.split(".") if qualname else []:
+        if obj is None:
+            break
+        obj = getattr(obj, part, None)
+    return obj
+
+
+class _NotifyingLoader:
+    """Loader wrapper that reports a module once it has been executed."""
+
+    def __init__(self, loader, on_import):
+        self._loader = loader
+        self._on_import = on_import
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Hand the real loader back to the module before anything can see the wrapper
+        module.__loader__ = self._loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self._loader
+        self._loader.exec_module(module)
+        self._on_import(module.__name__)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class LazyImportHook:
+    """Meta path finder that calls `on_import(module_name)` after a deferred module is imported.
+
+    The finder is only on sys.meta_path while something is deferred, and it
+    only intercepts the deferred module names, so other imports are unaffected.
+    """
+
+    def __init__(self, on_import):
+        self._on_import = on_import
+        self.pending = {}
+
+    def defer(self, module_name: str, entry):
+        self.pending.setdefault(module_name, []).append(entry)
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+
+    def pop(self, module_name: str):
+        entries = self.pending.pop(module_name, [])
+        if not self.pending:
+            self._uninstall()
+        return entries
+
+    def clear(self):
+        self.pending.clear()
+        self._uninstall()
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname not in self.pending:
+            return None
+
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                break
+        else:
+            return None
+
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _NotifyingLoader(spec.loader, self._on_import)
+        return spec
+
+    def _uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
@@ -0,0 +1,104 @@
+"""
+Throughput benchmark for the line filter sink.
+
+Usage: python tests/bench_line_filter.py [megabytes]
+
+Reports MB/s of output pushed through each sink for three write patterns:
+print()-style writes (text and newline separately), 64 KiB chunks and
+progress-bar writes ending in "\\r" with no newline until the end.
+"""
+import io
+import sys
+import time
+from pathlib import Path
+
+# ノードのルートディレクトリをパスに追加
+node_dir = str(Path(__file__).parent.parent)
+if node_dir not in sys.path:
+    sys.path.insert(0, node_dir)
+
+from filters import LineFilter
+from sinks import LineFilterSink, LineSink
+
+CHUNK_SIZE = 64 * 1024
+
+
+class NullTarget(io.TextIOBase):
+    def writable(self):
+        return True
+
+    def write(self, s):
+        return len(s)
+
+
+def make_lines(total_bytes):
+    samples = [
+        "Sampling step 12/30 | 40% | 1.23it/s",
+        "Loading weights from /models/checkpoints/model.safetensors",
+        "ERROR: prompt expansion failed for wildcard __colors__",
+        "debug: cache hit ratio 0.93",
+    ]
+    lines = []
+    size = 0
+    i = 0
+    while size < total_bytes:
+        line = f"{samples[i % len(samples)]} #{i}"
+        lines.append(line)
+        size += len(line) + 1
+        i += 1
+    return lines, size
+
+
+def run_print_style(sink, lines):
+    write = sink.write
+    for line in lines:
+        write(line)
+        write("\n")
+    sink.close()
+
+
+def run_progress_style(sink, lines):
+    write = sink.write
+    for line in lines:
+        write(line + "\r")
+    write("\n")
+    sink.close()
+
+
+def run_chunked(sink, text):
+    write = sink.write
+    for start in range(0, len(text), CHUNK_SIZE):
+        write(text[start:start + CHUNK_SIZE])
+    sink.close()
+
+
+def bench(label, make_sink, lines, text, size):
+    modes = (
+        ("print", run_print_style, lines),
+        ("chunk", run_chunked, text),
+        ("cr", run_progress_style, lines),
+    )
+    for mode, run, data in modes:
+        sink = make_sink()
+        started = time.perf_counter()
+        run(sink, data)
+        elapsed = time.perf_counter() - started
+        print(f"{label:<28} {mode:<6} {size / elapsed / 1e6:8.1f} MB/s")
+
+
+def main():
+    megabytes = float(sys.argv[1]) if len(sys.argv) > 1 else 16
+    lines, size = make_lines(int(megabytes * 1e6))
+    text = "\n".join(lines) + "\n"
+    many_patterns = [f"pattern_{i}\\d+" for i in range(50)] + ["ERROR"]
+
+    print(f"{size / 1e6:.1f} MB, {len(lines)} lines")
+    bench("LineSink (capture only)", lambda: LineSink(lambda line: None, max_length=1000), lines, text, size)
+    bench("keep 1 pattern", lambda: LineFilterSink(LineFilter(keep=["ERROR"]), NullTarget()), lines, text, size)
+    bench("drop 2 patterns", lambda: LineFilterSink(LineFilter(drop=[r"\d+%", "^debug"]), NullTarget()), lines, text, size)
+    bench("keep 1 + drop 2 patterns", lambda: LineFilterSink(LineFilter(keep=["ERROR"], drop=[r"\d+%", "^debug"]), NullTarget()), lines, text, size)
+    bench("keep 51 patterns", lambda: LineFilterSink(LineFilter(keep=many_patterns), NullTarget()), lines, text, size)
+
+
+if __name__ == "__main__":
+    main()
@@ -92,3 +92,24 @@ def mock_folder_paths(monkeypatch, tmp_path):
     monkeypatch.setattr(folder_paths, "get_user_directory", lambda: str(user_dir))
     
     return user_dir
+
+@pytest.fixture
+def fake_comfyui(mock_folder_paths):
+    """
+    Factory for in-process ComfyUI harnesses (see fake_comfyui.py).
+    Call with node_count / methods / mappings to boot the extension package.
+    """
+    from fake_comfyui import FakeComfyUI
+
+    harnesses = []
+
+    def factory(**kwargs):
+        harness = FakeComfyUI(mock_folder_paths, **kwargs)
+        harness.install()
+        harnesses.append(harness)
+        return harness
+
+    yield factory
+
+    for harness in reversed(harnesses):
+        harness.uninstall()
@@ -0,0 +1,155 @@
+"""
+In-process stand-in for ComfyUI's `server`, `nodes` and `folder_paths` modules.
+
+The real `__init__.py` is imported as a package against these fakes, so its
+routes are registered on a fake PromptServer and can be served by an aiohttp
+test server without starting ComfyUI.
+"""
+import importlib.util
+import os
+import sys
+import types
+from pathlib import Path
+
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+NODE_DIR = Path(__file__).parent.parent
+PACKAGE_NAME = "comfyui_remove_print_under_test"
+
+# Key used by prestartup_script.load_module() to cache data.py
+_DATA_MODULE_KEY = f"{NODE_DIR.name}.data"
+
+_FAKE_MODULES = ("server", "nodes", "folder_paths")
+
+
+class FakePromptServer:
+    """Minimal PromptServer: a route table, connected sockets and a recording send_sync()."""
+
+    instance = None
+
+    def __init__(self):
+        self.routes = web.RouteTableDef()
+        self.messages = []
+        self.sockets = {}
+        FakePromptServer.instance = self
+
+    def send_sync(self, event, data, sid=None):
+        self.messages.append((event, data, sid))
+
+
+def _make_method(node_name, method_name):
+    def method(self, *args, **kwargs):
+        print(f"{node_name}.{method_name} called")
+        return (node_name, method_name)
+
+    method.__name__ = method_name
+    method.__qualname__ = f"{node_name}.{method_name}"
+    return method
+
+
+def make_node_class_mappings(count, methods=("run",), prefix="FakeNode"):
+    """Build `count` synthetic node classes that print from each method."""
+    mappings = {}
+    for i in range(count):
+        name = f"{prefix}{i:05d}"
+        attrs = {method: _make_method(name, method) for method in methods}
+        mappings[name] = type(name, (), attrs)
+    return mappings
+
+
+class FakeComfyUI:
+    """Boot the extension package against fake ComfyUI modules.
+
+    Usage:
+        harness = FakeComfyUI(user_dir, node_count=1000)
+        harness.install()
+        client = await harness.start_client()
+        ...
+        await client.close()
+        harness.uninstall()
+    """
+
+    def __init__(self, user_dir, node_count=10, methods=("run",), mappings=None, custom_node_modules=()):
+        self.user_dir = str(user_dir)
+        # Imported by the fake load_custom_nodes(), as other custom nodes would
+        self.custom_node_modules = list(custom_node_modules)
+        if mappings is None:
+            mappings = make_node_class_mappings(node_count, methods)
+        self.node_class_mappings = mappings
+        self.server = None
+        self.package = None
+        self._saved_modules = {}
+
+    def install(self):
+        """Register the fake modules, import the package and fire the load callbacks."""
+        self.server = FakePromptServer()
+
+        server_module = types.ModuleType("server")
+        server_module.PromptServer = FakePromptServer
+
+        nodes_module = types.ModuleType("nodes")
+        nodes_module.NODE_CLASS_MAPPINGS = self.node_class_mappings
+        nodes_module.load_custom_nodes = self._load_custom_nodes
+
+        folder_paths_module = types.ModuleType("folder_paths")
+        folder_paths_module.get_user_directory = lambda: self.user_dir
+
+        fakes = {
+            "server": server_module,
+            "nodes": nodes_module,
+            "folder_paths": folder_paths_module,
+        }
+        for name in _FAKE_MODULES:
+            self._saved_modules[name] = sys.modules.get(name)
+            sys.modules[name] = fakes[name]
+
+        self._forget_package()
+        spec = importlib.util.spec_from_file_location(
+            PACKAGE_NAME,
+            os.path.join(NODE_DIR, "__init__.py"),
+            submodule_search_locations=[str(NODE_DIR)],
+        )
+        package = importlib.util.module_from_spec(spec)
+        sys.modules[PACKAGE_NAME] = package
+        spec.loader.exec_module(package)
+        self.package = package
+
+        # prestartup_script has replaced nodes.load_custom_nodes with its hook
+        nodes_module.load_custom_nodes()
+        return package
+
+    def _load_custom_nodes(self, *args):
+        for name in self.custom_node_modules:
+            importlib.import_module(name)
+
+    def uninstall(self):
+        """Restore hooked methods and the modules replaced by install()."""
+        if self.package is not None:
+            self.package._restore_hooks(self.node_class_mappings)
+            self.package = None
+        self._forget_package()
+        for name, module in self._saved_modules.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+        self._saved_modules.clear()
+        FakePromptServer.instance = None
+
+    def make_app(self):
+        app = web.Application()
+        app.add_routes(self.server.routes)
+        return app
+
+    async def start_client(self):
+        """Start an in-process test server with the package routes and return its client."""
+        client = TestClient(TestServer(self.make_app()))
+        await client.start_server()
+        return client
+
+    def _forget_package(self):
+        for name in list(sys.modules):
+            if name == PACKAGE_NAME or name.startswith(PACKAGE_NAME + "."):
+                del sys.modules[name]
+        sys.modules.pop(_DATA_MODULE_KEY, None)
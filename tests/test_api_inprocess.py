@@ -0,0 +1,160 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+pytest.importorskip("aiohttp")
+pytest.importorskip("pytest_asyncio")
+
+NODE_COUNT = 2000
+
+
+def _hooks_for(names, method="run"):
+    return [{"node": name, "method": method, "enabled": True} for name in names]
+
+
+@pytest.mark.asyncio
+async def test_nodes_and_methods(fake_comfyui):
+    harness = fake_comfyui(node_count=NODE_COUNT, methods=("run", "describe"))
+    client = await harness.start_client()
+    try:
+        resp = await client.get("/remove-print/nodes")
+        assert resp.status == 200
+        nodes = (await resp.json())["nodes"]
+        assert nodes == sorted(harness.node_class_mappings)
+
+        resp = await client.get(f"/remove-print/methods/{nodes[0]}")
+        assert (await resp.json())["methods"] == ["describe", "run"]
+
+        resp = await client.get("/remove-print/methods/Missing")
+        assert resp.status == 404
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_save_hooks_suppresses_output(fake_comfyui, capsys):
+    harness = fake_comfyui(node_count=3)
+    client = await harness.start_client()
+    try:
+        names = sorted(harness.node_class_mappings)
+        resp = await client.post("/remove-print/hooks", json={"hooks": _hooks_for(names[:2])})
+        data = await resp.json()
+        assert data["status"] == "ok"
+        assert sorted(map(tuple, data["hooked"])) == [(name, "run") for name in names[:2]]
+
+        capsys.readouterr()
+        for name in names:
+            harness.node_class_mappings[name]().run()
+        out = capsys.readouterr().out
+        assert f"{names[0]}.run called" not in out
+        assert f"{names[1]}.run called" not in out
+        assert f"{names[2]}.run called" in out
+
+        resp = await client.delete("/remove-print/hooks")
+        assert (await resp.json())["status"] == "ok"
+        harness.node_class_mappings[names[0]]().run()
+        assert f"{names[0]}.run called" in capsys.readouterr().out
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests(fake_comfyui):
+    harness = fake_comfyui(node_count=NODE_COUNT)
+    client = await harness.start_client()
+    try:
+        names = sorted(harness.node_class_mappings)
+
+        async def save(i):
+            resp = await client.post("/remove-print/hooks", json={"hooks": _hooks_for(names[i::20])})
+            return await resp.json()
+
+        async def list_nodes():
+            resp = await client.get("/remove-print/nodes")
+            return len((await resp.json())["nodes"])
+
+        started = time.monotonic()
+        results = await asyncio.gather(
+            *[save(i) for i in range(20)],
+            *[list_nodes() for _ in range(200)],
+        )
+        elapsed = time.monotonic() - started
+
+        saves, listings = results[:20], results[20:]
+        assert all(result["status"] == "ok" for result in saves)
+        assert listings == [NODE_COUNT] * 200
+        assert elapsed < 30
+
+        # The last saved settings are the ones that stay applied
+        resp = await client.get("/remove-print/hooks")
+        saved = (await resp.json())["hooks"]
+        hooked = sorted(harness.package._hooked_methods)
+        assert hooked == sorted((hook["node"], hook["method"]) for hook in saved)
+    finally:
+        await client.close()
+
+
+def test_reload_hooks_load(fake_comfyui):
+    harness = fake_comfyui(node_count=NODE_COUNT)
+    package = harness.package
+    names = sorted(harness.node_class_mappings)
+    originals = {name: harness.node_class_mappings[name].run for name in names}
+
+    user_path = package.get_user_hooks_path()
+    os.makedirs(os.path.dirname(user_path), exist_ok=True)
+    with open(user_path, "w", encoding="utf-8") as f:
+        json.dump({"hooks": _hooks_for(names)}, f)
+
+    started = time.monotonic()
+    for _ in range(20):
+        package.reload_hooks()
+    elapsed = time.monotonic() - started
+
+    assert len(package._hooked_methods) == NODE_COUNT
+    assert elapsed < 30
+
+    package._restore_hooks(harness.node_class_mappings)
+    assert all(harness.node_class_mappings[name].run is originals[name] for name in names)
+
+
+@pytest.mark.asyncio
+async def test_stream_subscription(fake_comfyui):
+    harness = fake_comfyui(node_count=1)
+    client = await harness.start_client()
+    try:
+        name = next(iter(harness.node_class_mappings))
+        await client.post("/remove-print/hooks", json={"hooks": _hooks_for([name])})
+
+        harness.server.sockets["abc"] = object()
+        resp = await client.post("/remove-print/stream", json={"client_id": "abc"})
+        assert (await resp.json())["subscribed"] is True
+
+        harness.node_class_mappings[name]().run()
+        harness.package.stats_stream.flush()
+
+        event, data, sid = harness.server.messages[-1]
+        assert event == "remove-print.stats"
+        assert sid == "abc"
+        assert data["hooks"] == {f"{name}.run": {"calls": 1, "lines": 1}}
+        assert data["lines"] == [{"hook": f"{name}.run", "text": f"{name}.run called"}]
+
+        resp = await client.post("/remove-print/stream", json={"client_id": "abc", "enabled": False})
+        assert (await resp.json())["subscribed"] is False
+
+        # A tab that disconnects without unsubscribing is dropped on the next flush
+        await client.post("/remove-print/stream", json={"client_id": "abc"})
+        del harness.server.sockets["abc"]
+        harness.node_class_mappings[name]().run()
+        message_count = len(harness.server.messages)
+        harness.package.stats_stream.flush()
+        assert len(harness.server.messages) == message_count
+        assert not harness.package.stats_stream.is_subscribed("abc")
+        assert not harness.package.stats_stream.active
+
+        resp = await client.post("/remove-print/stream", json={})
+        assert resp.status == 400
+    finally:
+        await client.close()
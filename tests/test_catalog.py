@@ -0,0 +1,118 @@
+import json
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# ノードのルートディレクトリをパスに追加
+node_dir = str(Path(__file__).parent.parent)
+if node_dir not in sys.path:
+    sys.path.insert(0, node_dir)
+
+from catalog import CatalogVersion
+
+
+class NodeA:
+    pass
+
+
+class NodeB:
+    pass
+
+
+@pytest.fixture
+def locales_dir(tmp_path):
+    root = tmp_path / "locales"
+    for lang in ("en", "ja"):
+        (root / lang).mkdir(parents=True)
+        (root / lang / "main.json").write_text(json.dumps({"modal.title": lang}), encoding="utf-8")
+    return root
+
+
+def test_version_is_stable(locales_dir):
+    catalog = CatalogVersion(str(locales_dir))
+    mappings = {"A": NodeA, "B": NodeB}
+    version = catalog.get(mappings)
+    assert version == catalog.get(mappings)
+    assert version == CatalogVersion(str(locales_dir)).get(dict(reversed(mappings.items())))
+
+
+def test_version_changes_with_nodes(locales_dir):
+    catalog = CatalogVersion(str(locales_dir))
+    mappings = {"A": NodeA}
+    version = catalog.get(mappings)
+
+    mappings["B"] = NodeB
+    # Node changes are only picked up after invalidate()
+    assert catalog.get(mappings) == version
+    catalog.invalidate()
+    assert catalog.get(mappings) != version
+
+    # Replacing a node's class changes the version too
+    other = CatalogVersion(str(locales_dir))
+    assert other.get({"A": NodeB, "B": NodeB}) != catalog.get(mappings)
+
+
+def test_version_changes_with_methods(locales_dir):
+    class Node:
+        def run(self):
+            pass
+
+    catalog = CatalogVersion(str(locales_dir))
+    mappings = {"Node": Node}
+    version = catalog.get(mappings)
+
+    Node.process = lambda self: None
+    catalog.invalidate()
+    assert catalog.get(mappings) != version
+
+    # Private methods are not listed by the UI and do not change the version
+    version = catalog.get(mappings)
+    Node._helper = lambda self: None
+    catalog.invalidate()
+    assert catalog.get(mappings) == version
+
+
+def test_version_changes_with_locale_files(locales_dir):
+    catalog = CatalogVersion(str(locales_dir))
+    version = catalog.get({})
+
+    path = locales_dir / "ja" / "main.json"
+    path.write_text(json.dumps({"modal.title": "タイトル"}), encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert catalog.get({}) != version
+
+    assert catalog.load_locales() == {
+        "en": {"modal.title": "en"},
+        "ja": {"modal.title": "タイトル"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_catalog_endpoints(fake_comfyui):
+    harness = fake_comfyui(node_count=500)
+    client = await harness.start_client()
+    try:
+        resp = await client.get("/remove-print/catalog-version")
+        version = (await resp.json())["version"]
+
+        resp = await client.get("/remove-print/catalog")
+        data = await resp.json()
+        assert data["version"] == version
+        assert data["nodes"] == sorted(harness.node_class_mappings)
+        assert {"en", "ja"} <= set(data["locales"])
+        assert data["locales"]["en"]["modal.title"]
+
+        # Saving hooks does not change the catalog
+        await client.post("/remove-print/hooks", json={"hooks": [
+            {"node": data["nodes"][0], "method": "run", "enabled": True},
+        ]})
+        resp = await client.get("/remove-print/catalog-version")
+        assert (await resp.json())["version"] == version
+
+        resp = await client.get("/remove-print/nodes")
+        assert (await resp.json())["version"] == version
+    finally:
+        await client.close()
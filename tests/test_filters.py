@@ -0,0 +1,154 @@
+import io
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+# ノードのルートディレクトリをパスに追加
+node_dir = str(Path(__file__).parent.parent)
+if node_dir not in sys.path:
+    sys.path.insert(0, node_dir)
+
+from filters import LineFilter, make_line_filter
+from sinks import LineFilterSink
+
+
+def test_make_line_filter():
+    assert make_line_filter({"node": "A", "method": "run"}) is None
+    assert make_line_filter({"keep": [], "drop": []}) is None
+    assert isinstance(make_line_filter({"keep": ["ERROR"]}), LineFilter)
+
+    with pytest.raises(re.error):
+        make_line_filter({"keep": ["("]})
+    with pytest.raises(TypeError):
+        make_line_filter({"drop": "progress"})
+
+
+def test_leading_flags_apply_to_their_pattern_only():
+    line_filter = LineFilter(keep=["(?i)error"], drop=["debug", "(?x) step \\d # progress"])
+    assert line_filter.keeps("ERROR: bad")
+    assert line_filter.keeps("Error in step1")
+    assert not line_filter.keeps("step1")
+
+    line_filter = LineFilter(drop=["(?i)debug", "step"])
+    assert not line_filter.keeps("DEBUG: x")
+    assert line_filter.keeps("STEP 1")
+
+
+def test_invalid_patterns_are_named():
+    with pytest.raises(re.error, match=r"in pattern 'a\(\?i\)b'"):
+        LineFilter(keep=["ERROR", "a(?i)b"])
+    with pytest.raises(re.error, match=r"backreferences are not supported in pattern '\(\\\\w\)\\\\1'"):
+        LineFilter(drop=[r"(\w)\1"])
+    with pytest.raises(re.error, match="backreferences"):
+        LineFilter(keep=["(?P<level>INFO) (?P=level)"])
+    with pytest.raises(re.error, match="backreferences"):
+        LineFilter(keep=["(<)?x(?(1)>)"])
+    # An escape inside a character class is an octal escape, not a backreference
+    assert LineFilter(keep=[r"[\1]"]).keeps("\x01")
+    with pytest.raises(re.error, match="already used"):
+        LineFilter(keep=["(?P<level>INFO)"], drop=["(?P<level>DEBUG)"])
+    # An escaped backslash followed by a digit is not a backreference
+    assert LineFilter(keep=[r"C:\\1"]).keeps(r"C:\1")
+
+
+def test_keep_patterns_act_as_whitelist():
+    line_filter = LineFilter(keep=["ERROR", r"^WARN\b"])
+    assert line_filter.keeps("something ERROR happened")
+    assert line_filter.keeps("WARN disk")
+    assert not line_filter.keeps("no WARN at start")
+    assert not line_filter.keeps("progress 10%")
+
+
+def test_drop_patterns_act_as_blacklist():
+    line_filter = LineFilter(drop=[r"\d+%", "^debug"])
+    assert not line_filter.keeps("progress 10%")
+    assert not line_filter.keeps("debug: x")
+    assert line_filter.keeps("loaded model")
+
+
+def test_keep_wins_over_drop():
+    line_filter = LineFilter(keep=["ERROR"], drop=["step"])
+    assert line_filter.keeps("step 3 ERROR")
+    assert not line_filter.keeps("step 3")
+    # Keep patterns present: unmatched lines are dropped
+    assert not line_filter.keeps("other")
+
+
+def test_filter_sink_buffers_partial_writes():
+    target = io.StringIO()
+    dropped = []
+    sink = LineFilterSink(LineFilter(keep=["ERROR"]), target, on_drop=dropped.append)
+
+    sink.write("step 1\nERR")
+    assert target.getvalue() == ""
+    sink.write("OR: bad")
+    sink.write("\n")
+    sink.write("step 2\nstep 3\nERROR: tail")
+    assert target.getvalue() == "ERROR: bad\n"
+    sink.close()
+
+    assert target.getvalue() == "ERROR: bad\nERROR: tail"
+    assert dropped == ["step 1", "step 2", "step 3"]
+
+
+def test_filter_sink_handles_many_writes_without_newline():
+    target = io.StringIO()
+    sink = LineFilterSink(LineFilter(drop=["^debug"]), target)
+    for i in range(100_000):
+        sink.write(f"{i}%\r")
+    sink.write("\n")
+    sink.close()
+    expected = "".join(f"{i}%\r" for i in range(100_000)) + "\n"
+    assert target.getvalue() == expected
+
+
+def test_filter_sink_exposes_target_encoding():
+    target = io.TextIOWrapper(io.BytesIO(), encoding="utf-16", errors="ignore")
+    sink = LineFilterSink(LineFilter(keep=["ERROR"]), target)
+    assert (sink.encoding, sink.errors) == ("utf-16", "ignore")
+    assert sink.fileno() == sink.buffer.fileno()
+    sink.close()
+
+    sink = LineFilterSink(LineFilter(keep=["ERROR"]), io.StringIO())
+    assert sink.encoding.lower() == "utf-8"
+    sink.close()
+
+
+def test_filter_sink_matches_line_filter():
+    line_filter = LineFilter(keep=["ERROR"], drop=["step", r"\d+%"])
+    lines = ["step 1 50%", "step 2 ERROR", "50% ERROR step", "other", "ERROR", ""]
+    target = io.StringIO()
+    sink = LineFilterSink(line_filter, target)
+    sink.write("\n".join(lines) + "\n")
+    sink.close()
+    expected = [line for line in lines if line_filter.keeps(line)]
+    assert expected == ["step 2 ERROR", "50% ERROR step", "ERROR"]
+    assert target.getvalue() == "\n".join(expected) + "\n"
+
+
+@pytest.mark.asyncio
+async def test_filtered_hook_keeps_matching_lines(fake_comfyui, capsys):
+    harness = fake_comfyui(node_count=1)
+    client = await harness.start_client()
+    try:
+        name = next(iter(harness.node_class_mappings))
+        node_class = harness.node_class_mappings[name]
+
+        def noisy(self):
+            for i in range(3):
+                print(f"step {i}")
+            print("ERROR: something failed")
+            return "done"
+
+        node_class.run = noisy
+        await client.post("/remove-print/hooks", json={"hooks": [
+            {"node": name, "method": "run", "enabled": True, "keep": ["ERROR"]},
+        ]})
+
+        capsys.readouterr()
+        assert node_class().run() == "done"
+        assert capsys.readouterr().out == "ERROR: something failed\n"
+    finally:
+        await client.close()
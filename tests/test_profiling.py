@@ -0,0 +1,306 @@
+import marshal
+import pstats
+import sys
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+# ノードのルートディレクトリをパスに追加
+node_dir = str(Path(__file__).parent.parent)
+if node_dir not in sys.path:
+    sys.path.insert(0, node_dir)
+
+from profiling import CpuProfile, MemoryProfile, current_rss, start_tracemalloc, stop_tracemalloc
+
+
+def allocate(size):
+    kept = bytearray(size)
+    temporary = [bytearray(size) for _ in range(4)]
+    del temporary
+    return kept
+
+
+def test_tracemalloc_refcount():
+    assert not tracemalloc.is_tracing()
+    assert start_tracemalloc() is True
+    assert start_tracemalloc() is False
+    stop_tracemalloc()
+    assert tracemalloc.is_tracing()
+    stop_tracemalloc()
+    assert not tracemalloc.is_tracing()
+
+
+@pytest.mark.parametrize("outer_session", [False, True])
+def test_memory_profile_records_peak_and_net(outer_session):
+    profile = MemoryProfile()
+    if outer_session:
+        # Nested or concurrent profiled calls join the running session
+        start_tracemalloc()
+    try:
+        kept = [profile.run(allocate, (1_000_000,), {}) for _ in range(2)]
+    finally:
+        if outer_session:
+            stop_tracemalloc()
+
+    report = profile.snapshot()
+    assert report["calls"] == 2
+    assert report["last"]["net"] >= 1_000_000
+    assert report["peak_max"] >= 2_000_000
+    assert report["net_total"] >= 2_000_000
+    assert report["top"][0]["site"].endswith(f"test_profiling.py:{allocate.__code__.co_firstlineno + 1}")
+    assert report["top"][0]["size_diff"] >= 2_000_000
+    assert len(kept) == 2
+
+
+def test_nested_call_keeps_outer_peak():
+    outer_profile = MemoryProfile()
+    inner_profile = MemoryProfile()
+
+    def outer():
+        buffer = bytearray(20_000_000)
+        del buffer
+        return inner_profile.run(allocate, (20_000,), {})
+
+    outer_profile.run(outer, (), {})
+    assert outer_profile.snapshot()["peak_max"] >= 20_000_000
+    assert inner_profile.snapshot()["peak_max"] < 1_000_000
+
+
+def test_memory_profile_traces_only_during_calls():
+    profile = MemoryProfile()
+
+    def check_tracing():
+        return tracemalloc.is_tracing()
+
+    assert not tracemalloc.is_tracing()
+    assert profile.run(check_tracing, (), {}) is True
+    assert not tracemalloc.is_tracing()
+    assert profile.run(profile.run, (check_tracing, (), {}), {}) is True
+    assert not tracemalloc.is_tracing()
+    assert profile.snapshot()["calls"] == 3
+
+
+def test_current_rss():
+    rss = current_rss()
+    assert rss is None or rss > 0
+
+
+@pytest.mark.asyncio
+async def test_memory_hook_endpoint(fake_comfyui, capsys):
+    harness = fake_comfyui(node_count=2)
+    client = await harness.start_client()
+    try:
+        profiled, other = sorted(harness.node_class_mappings)
+        node_class = harness.node_class_mappings[profiled]
+
+        def run(self):
+            print("not suppressed")
+            return allocate(500_000)
+
+        node_class.run = run
+        await client.post("/remove-print/hooks", json={"hooks": [
+            {"node": profiled, "method": "run", "enabled": True, "type": "memory"},
+            {"node": other, "method": "run", "enabled": True},
+        ]})
+
+        capsys.readouterr()
+        assert len(node_class().run()) == 500_000
+        assert "not suppressed" in capsys.readouterr().out
+        # tracemalloc only runs during profiled calls
+        assert not tracemalloc.is_tracing()
+
+        resp = await client.get("/remove-print/memory")
+        data = await resp.json()
+        assert data["tracing"] is False
+        assert list(data["profiles"]) == [f"{profiled}.run"]
+        report = data["profiles"][f"{profiled}.run"]
+        assert report["calls"] == 1
+        assert report["last"]["net"] >= 500_000
+
+        resp = await client.delete("/remove-print/memory")
+        assert (await resp.json())["status"] == "ok"
+        resp = await client.get("/remove-print/memory")
+        assert (await resp.json())["profiles"][f"{profiled}.run"]["calls"] == 0
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_unknown_hook_type_is_skipped(fake_comfyui, capsys):
+    harness = fake_comfyui(node_count=1)
+    client = await harness.start_client()
+    try:
+        name = next(iter(harness.node_class_mappings))
+        resp = await client.post("/remove-print/hooks", json={"hooks": [
+            {"node": name, "method": "run", "enabled": True, "type": "bogus"},
+        ]})
+        assert (await resp.json())["hooked"] == []
+        assert f'Unknown hook type "bogus": {name}.run' in capsys.readouterr().out
+    finally:
+        await client.close()
+
+
+def busy(n):
+    return sum(i * i for i in range(n))
+
+
+def test_cpu_profile_aggregates_and_completes():
+    completed = []
+    profile = CpuProfile(2, on_complete=lambda: completed.append(True))
+    assert profile.summary()["top"] == []
+
+    for _ in range(4):
+        assert profile.run(busy, (1000,), {}) == busy(1000)
+
+    summary = profile.summary()
+    assert summary["calls"] == 2
+    assert summary["complete"] is True
+    assert completed == [True]
+
+    busy_row = next(row for row in summary["top"] if row["function"].endswith("(busy)"))
+    assert busy_row["ncalls"] == 2
+
+    stats = marshal.loads(profile.dump())
+    assert any(func[2] == "busy" for func in stats)
+
+
+@pytest.mark.asyncio
+async def test_cpu_hook_removes_itself(fake_comfyui, tmp_path):
+    harness = fake_comfyui(node_count=1)
+    client = await harness.start_client()
+    try:
+        name = next(iter(harness.node_class_mappings))
+        node_class = harness.node_class_mappings[name]
+
+        def run(self):
+            return busy(2000)
+
+        node_class.run = run
+        resp = await client.post("/remove-print/hooks", json={"hooks": [
+            {"node": name, "method": "run", "enabled": True, "type": "cpu", "calls": 3},
+        ]})
+        assert (await resp.json())["hooked"] == [[name, "run"]]
+        assert node_class.run is not run
+
+        for _ in range(3):
+            node_class().run()
+        # Restored to the original after the third call
+        assert node_class.run is run
+        assert harness.package._hooked_methods == {}
+        assert harness.package._stacked_hooks == {}
+
+        resp = await client.get("/remove-print/cpu")
+        summary = (await resp.json())["profiles"][f"{name}.run"]
+        assert (summary["calls"], summary["complete"]) == (3, True)
+        assert any(row["function"].endswith("(busy)") for row in summary["top"])
+
+        resp = await client.get("/remove-print/cpu/pstats", params={"hook": f"{name}.run"})
+        assert resp.status == 200
+        assert f'filename="{name}.run.pstats"' in resp.headers["Content-Disposition"]
+        path = tmp_path / "run.pstats"
+        path.write_bytes(await resp.read())
+        assert pstats.Stats(str(path)).total_calls > 0
+
+        resp = await client.get("/remove-print/cpu/pstats", params={"hook": "Missing.run"})
+        assert resp.status == 404
+
+        # A completed profile is not re-armed on reload...
+        harness.package.reload_hooks()
+        assert node_class.run is run
+
+        # ...until it is cleared
+        resp = await client.delete("/remove-print/cpu", params={"hook": f"{name}.run"})
+        assert (await resp.json())["hooked"] == [[name, "run"]]
+        assert node_class.run is not run
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_profiling_hooks_stack_on_suppress_hook(fake_comfyui, capsys):
+    harness = fake_comfyui(node_count=1)
+    client = await harness.start_client()
+    try:
+        name = next(iter(harness.node_class_mappings))
+        node_class = harness.node_class_mappings[name]
+
+        def run(self):
+            print("noisy")
+            return busy(2000)
+
+        node_class.run = run
+        # Listed before the suppress hook; profiling hooks are still applied on top
+        resp = await client.post("/remove-print/hooks", json={"hooks": [
+            {"node": name, "method": "run", "enabled": True, "type": "cpu", "calls": 2},
+            {"node": name, "method": "run", "enabled": True, "type": "memory"},
+            {"node": name, "method": "run", "enabled": True},
+        ]})
+        assert (await resp.json())["hooked"] == [[name, "run"]]
+        assert "Already hooked" not in capsys.readouterr().out
+        assert harness.package._hooked_methods[(name, "run")] is run
+
+        for _ in range(2):
+            assert node_class().run() == busy(2000)
+        assert "noisy" not in capsys.readouterr().out
+
+        resp = await client.get("/remove-print/cpu")
+        assert (await resp.json())["profiles"][f"{name}.run"]["calls"] == 2
+        resp = await client.get("/remove-print/memory")
+        assert (await resp.json())["profiles"][f"{name}.run"]["calls"] == 2
+
+        # The memory hook sits on top, so the completed cpu hook stays as a pass-through
+        assert (name, "run", "cpu") in harness.package._stacked_hooks
+
+        # Without the memory hook, the completed cpu hook puts the suppress hook back
+        await client.post("/remove-print/hooks", json={"hooks": [
+            {"node": name, "method": "run", "enabled": True, "type": "cpu", "calls": 1},
+            {"node": name, "method": "run", "enabled": True},
+        ]})
+        await client.delete("/remove-print/cpu")
+        profiled = node_class.run
+        node_class().run()
+        assert node_class.run is not profiled
+        assert node_class.run is not run
+        assert list(harness.package._stacked_hooks) == []
+        capsys.readouterr()
+        node_class().run()
+        assert "noisy" not in capsys.readouterr().out
+
+        harness.package._restore_hooks(harness.node_class_mappings)
+        assert node_class.run is run
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_cpu_hook_completion_never_fails_the_call(fake_comfyui, capsys):
+    harness = fake_comfyui(node_count=1)
+    client = await harness.start_client()
+    try:
+        package = harness.package
+        name = next(iter(harness.node_class_mappings))
+        node_class = harness.node_class_mappings[name]
+        hooks = [{"node": name, "method": "run", "enabled": True, "type": "cpu", "calls": 1}]
+
+        # A reload that has already unwound the stacked hooks but not yet the cpu hooks
+        await client.post("/remove-print/hooks", json={"hooks": hooks})
+        package._stacked_hooks.clear()
+        assert node_class().run() == (name, "run")
+
+        # Bookkeeping errors are reported, not raised into the node's call
+        await client.delete("/remove-print/cpu")
+
+        def broken_resolve(owner_name, mappings):
+            raise RuntimeError("boom")
+
+        original_resolve = package._resolve_owner
+        package._resolve_owner = broken_resolve
+        try:
+            capsys.readouterr()
+            assert node_class().run() == (name, "run")
+        finally:
+            package._resolve_owner = original_resolve
+        assert f"Failed to remove completed cpu hook {name}.run: boom" in capsys.readouterr().out
+    finally:
+        await client.close()
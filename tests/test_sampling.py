@@ -0,0 +1,75 @@
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# ノードのルートディレクトリをパスに追加
+node_dir = str(Path(__file__).parent.parent)
+if node_dir not in sys.path:
+    sys.path.insert(0, node_dir)
+
+from sampling import Sampler, make_sampler
+
+
+def test_make_sampler():
+    assert make_sampler({"node": "A", "method": "run"}) is None
+    assert make_sampler({"sample_every": 0}) is None
+
+    sampler = make_sampler({"sample_every": "5", "sample_interval": 2})
+    assert (sampler.every, sampler.interval) == (5, 2.0)
+
+    with pytest.raises(ValueError):
+        make_sampler({"sample_every": -1})
+    with pytest.raises(ValueError):
+        make_sampler({"sample_interval": "often"})
+
+
+def test_sample_every_n_calls():
+    sampler = Sampler(every=4)
+    decisions = [sampler.should_sample() for _ in range(10)]
+    assert decisions == [True, False, False, False, True, False, False, False, True, False]
+    assert sampler.snapshot() == {
+        "every": 4,
+        "interval": 0.0,
+        "calls": 10,
+        "sampled": 3,
+        "suppressed": 7,
+    }
+
+
+def test_sample_interval():
+    sampler = Sampler(interval=0.05)
+    assert sampler.should_sample()
+    assert not sampler.should_sample()
+    time.sleep(0.06)
+    assert sampler.should_sample()
+    assert (sampler.sampled, sampler.suppressed) == (2, 1)
+
+
+@pytest.mark.asyncio
+async def test_sampled_hook_passes_through(fake_comfyui, capsys):
+    harness = fake_comfyui(node_count=2)
+    client = await harness.start_client()
+    try:
+        sampled, plain = sorted(harness.node_class_mappings)
+        await client.post("/remove-print/hooks", json={"hooks": [
+            {"node": sampled, "method": "run", "enabled": True, "sample_every": 3},
+            {"node": plain, "method": "run", "enabled": True},
+        ]})
+
+        capsys.readouterr()
+        for _ in range(7):
+            harness.node_class_mappings[sampled]().run()
+            harness.node_class_mappings[plain]().run()
+        out = capsys.readouterr().out
+        assert out.count(f"{sampled}.run called") == 3
+        assert f"{plain}.run called" not in out
+
+        resp = await client.get("/remove-print/stats")
+        stats = (await resp.json())["stats"]
+        assert list(stats) == [f"{sampled}.run"]
+        assert stats[f"{sampled}.run"]["sampled"] == 3
+        assert stats[f"{sampled}.run"]["suppressed"] == 4
+    finally:
+        await client.close()
@@ -0,0 +1,175 @@
+import io
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# ノードのルートディレクトリをパスに追加
+node_dir = str(Path(__file__).parent.parent)
+if node_dir not in sys.path:
+    sys.path.insert(0, node_dir)
+
+from sinks import LineSink
+from stream import StatsStream, EVENT_NAME
+
+
+class RecordingSender:
+    def __init__(self):
+        self.messages = []
+
+    def __call__(self, event, data, sid=None):
+        self.messages.append((event, data, sid))
+
+
+def test_line_sink_buffers_partial_writes():
+    lines = []
+    sink = LineSink(lines.append)
+    sink.write("hel")
+    sink.write("lo\nwor")
+    assert lines == ["hello"]
+    sink.write("ld\n\nlast")
+    assert lines == ["hello", "world", ""]
+    sink.close()
+    assert lines == ["hello", "world", "", "last"]
+
+
+def test_line_sink_handles_many_writes_without_newline():
+    lines = []
+    sink = LineSink(lines.append, max_length=1000)
+    start = time.perf_counter()
+    for i in range(100_000):
+        sink.write(f"progress {i}\r")
+    sink.write("done\n")
+    elapsed = time.perf_counter() - start
+    sink.close()
+
+    assert len(lines) == 1
+    assert lines[0].startswith("progress 0\rprogress 1\r")
+    # Writes beyond max_length are discarded instead of growing the pending line
+    assert len(lines[0]) < 1100
+    assert lines[0].endswith("done")
+    assert elapsed < 2
+
+    # Without a limit, the whole line is kept
+    lines = []
+    sink = LineSink(lines.append)
+    for i in range(100_000):
+        sink.write("x")
+    sink.close()
+    assert lines == ["x" * 100_000]
+
+
+def test_line_sink_behaves_like_stdout():
+    replaced = io.TextIOWrapper(io.BytesIO(), encoding="cp932", errors="replace")
+    lines = []
+    sink = LineSink(lines.append, replaced)
+    assert (sink.encoding, sink.errors) == ("cp932", "replace")
+
+    # Bytes and subprocess output bypass the line callback and are discarded
+    sink.buffer.write(b"raw bytes\n")
+    sink.buffer.flush()
+    result = subprocess.run([sys.executable, "-c", "print('child')"], stdout=sink)
+    assert result.returncode == 0
+    sink.write("text\n")
+    sink.close()
+    assert lines == ["text"]
+
+
+def test_no_subscribers_records_nothing():
+    stream = StatsStream(interval=0.01)
+    sender = RecordingSender()
+    stream.set_sender(sender)
+    assert not stream.active
+
+    stream.record_call("Node.method")
+    stream.record_line("Node.method", "noise")
+    stream.flush()
+    assert sender.messages == []
+
+
+def test_deltas_are_coalesced_into_one_message():
+    stream = StatsStream(interval=60)
+    sender = RecordingSender()
+    stream.set_sender(sender)
+    stream.subscribe("client-a")
+
+    for _ in range(100):
+        stream.record_call("Node.method")
+        stream.record_line("Node.method", "noise")
+    stream.flush()
+
+    assert len(sender.messages) == 1
+    event, data, sid = sender.messages[0]
+    assert event == EVENT_NAME
+    assert sid == "client-a"
+    assert data["hooks"] == {"Node.method": {"calls": 100, "lines": 100}}
+    assert len(data["lines"]) == 100
+
+    # 送信後はデルタがリセットされる
+    stream.flush()
+    assert len(sender.messages) == 1
+
+
+def test_lines_over_limit_are_dropped_and_counted():
+    stream = StatsStream(interval=60, max_lines=5)
+    sender = RecordingSender()
+    stream.set_sender(sender)
+    stream.subscribe("client-a")
+
+    for i in range(12):
+        stream.record_line("Node.method", f"line {i}")
+    stream.flush()
+
+    data = sender.messages[0][1]
+    assert [line["text"] for line in data["lines"]] == [f"line {i}" for i in range(5)]
+    assert data["dropped"] == 7
+    assert data["hooks"]["Node.method"]["lines"] == 12
+
+
+def test_timer_flushes_after_interval():
+    stream = StatsStream(interval=0.05)
+    sender = RecordingSender()
+    stream.set_sender(sender)
+    stream.subscribe("client-a")
+    stream.subscribe("client-b")
+
+    stream.record_call("Node.method")
+    deadline = time.monotonic() + 2
+    while len(sender.messages) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert sorted(sid for _, _, sid in sender.messages) == ["client-a", "client-b"]
+
+
+def test_unsubscribe_discards_pending_delta():
+    stream = StatsStream(interval=60)
+    sender = RecordingSender()
+    stream.set_sender(sender)
+    stream.subscribe("client-a")
+    stream.record_call("Node.method")
+
+    stream.unsubscribe("client-a")
+    stream.flush()
+    assert sender.messages == []
+    assert not stream.is_subscribed("client-a")
+
+
+def test_disconnected_subscribers_are_pruned():
+    stream = StatsStream(interval=60)
+    sender = RecordingSender()
+    connected = {"client-a", "client-b"}
+    stream.set_sender(sender, lambda sid: sid in connected)
+    stream.subscribe("client-a")
+    stream.subscribe("client-b")
+
+    connected.discard("client-b")
+    stream.record_call("Node.method")
+    stream.flush()
+    assert [sid for _, _, sid in sender.messages] == ["client-a"]
+    assert not stream.is_subscribed("client-b")
+
+    connected.clear()
+    stream.record_call("Node.method")
+    stream.flush()
+    assert len(sender.messages) == 1
+    assert not stream.active
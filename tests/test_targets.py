@@ -0,0 +1,169 @@
+import importlib
+import json
+import os
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+
+# ノードのルートディレクトリをパスに追加
+node_dir = str(Path(__file__).parent.parent)
+if node_dir not in sys.path:
+    sys.path.insert(0, node_dir)
+
+from targets import parse_target, format_target
+
+pytest.importorskip("aiohttp")
+
+FAKE_LIB = textwrap.dedent("""
+    def helper():
+        print("helper called")
+        return "helper"
+
+
+    class Helper:
+        @staticmethod
+        def static():
+            print("static called")
+            return "static"
+
+        @classmethod
+        def klass(cls):
+            print("klass called")
+            return cls.__name__
+
+        def method(self):
+            print("method called")
+            return "method"
+""")
+
+
+@pytest.fixture
+def fake_lib(tmp_path, monkeypatch):
+    """Importable throwaway module; removed from sys.modules afterwards."""
+    name = f"rp_fake_lib_{tmp_path.name}".replace("-", "_")
+    (tmp_path / f"{name}.py").write_text(FAKE_LIB, encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield name
+    sys.modules.pop(name, None)
+
+
+def _save_hooks(package, hooks):
+    user_path = package.get_user_hooks_path()
+    os.makedirs(os.path.dirname(user_path), exist_ok=True)
+    with open(user_path, "w", encoding="utf-8") as f:
+        json.dump({"hooks": hooks}, f)
+    package.reload_hooks()
+
+
+def test_parse_target():
+    assert parse_target("pkg.mod:func") == ("pkg.mod:", "func")
+    assert parse_target("pkg.mod:Cls.Inner.meth") == ("pkg.mod:Cls.Inner", "meth")
+    assert format_target(*parse_target("pkg.mod:func")) == "pkg.mod:func"
+    assert format_target(*parse_target("pkg.mod:Cls.meth")) == "pkg.mod:Cls.meth"
+    assert format_target("Node", "method") == "Node.method"
+
+    for invalid in ("pkg.mod", ":func", "pkg.mod:", "pkg.mod:Cls."):
+        with pytest.raises(ValueError):
+            parse_target(invalid)
+
+
+def test_target_hooks_are_deferred_until_import(fake_comfyui, fake_lib, capsys):
+    harness = fake_comfyui(node_count=1)
+    package = harness.package
+
+    _save_hooks(package, [
+        {"target": f"{fake_lib}:helper", "enabled": True},
+        {"target": f"{fake_lib}:Helper.static", "enabled": True},
+        {"target": f"{fake_lib}:Helper.klass", "enabled": True},
+        {"target": f"{fake_lib}:Helper.method", "enabled": True},
+    ])
+    assert fake_lib not in sys.modules
+    assert package._hooked_methods == {}
+    assert package._lazy_import_hook in sys.meta_path
+
+    lib = importlib.import_module(fake_lib)
+    assert package._lazy_import_hook not in sys.meta_path
+    assert lib.__spec__.loader.__class__.__name__ != "_NotifyingLoader"
+    assert sorted(package._hooked_methods) == [
+        (f"{fake_lib}:", "helper"),
+        (f"{fake_lib}:Helper", "klass"),
+        (f"{fake_lib}:Helper", "method"),
+        (f"{fake_lib}:Helper", "static"),
+    ]
+
+    capsys.readouterr()
+    assert lib.helper() == "helper"
+    assert lib.Helper.static() == "static"
+    assert lib.Helper().static() == "static"
+    assert lib.Helper.klass() == "Helper"
+    assert lib.Helper().klass() == "Helper"
+    assert lib.Helper().method() == "method"
+    assert "called" not in capsys.readouterr().out
+
+    package._restore_hooks(harness.node_class_mappings)
+    lib.helper()
+    lib.Helper.static()
+    lib.Helper().klass()
+    out = capsys.readouterr().out
+    assert "helper called" in out
+    assert "static called" in out
+    assert "klass called" in out
+    assert isinstance(vars(lib.Helper)["static"], staticmethod)
+
+
+def test_target_hook_on_imported_module(fake_comfyui, fake_lib, capsys):
+    lib = importlib.import_module(fake_lib)
+    original = lib.helper
+
+    harness = fake_comfyui(node_count=1)
+    package = harness.package
+    _save_hooks(package, [
+        {"target": f"{fake_lib}:helper", "enabled": True},
+        {"target": f"{fake_lib}:missing", "enabled": True},
+        {"target": f"{fake_lib}:Helper.method", "enabled": False},
+    ])
+
+    assert sorted(package._hooked_methods) == [(f"{fake_lib}:", "helper")]
+    assert package._lazy_import_hook not in sys.meta_path
+    out = capsys.readouterr().out
+    assert f"Target not found: {fake_lib}:missing" in out
+    assert f"Skipped (disabled): {fake_lib}:Helper.method" in out
+
+    lib.helper()
+    assert "helper called" not in capsys.readouterr().out
+
+    package._restore_hooks(harness.node_class_mappings)
+    assert lib.helper is original
+
+
+def test_target_hooks_apply_to_from_imports(fake_comfyui, fake_lib, mock_folder_paths, tmp_path, capsys):
+    # Saved before the package is imported, as on a ComfyUI restart
+    user_path = mock_folder_paths / "default" / "comfyui-remove-print" / "hooks.json"
+    user_path.parent.mkdir(parents=True)
+    user_path.write_text(json.dumps({"hooks": [
+        {"target": f"{fake_lib}:helper", "enabled": True},
+    ]}), encoding="utf-8")
+
+    consumer = f"{fake_lib}_consumer"
+    (tmp_path / f"{consumer}.py").write_text(textwrap.dedent(f"""
+        from {fake_lib} import helper
+
+
+        def use_helper():
+            return helper()
+    """), encoding="utf-8")
+
+    try:
+        # The consumer stands in for a custom node loaded after this package
+        harness = fake_comfyui(node_count=1, custom_node_modules=[consumer])
+        package = harness.package
+        module = sys.modules[consumer]
+        capsys.readouterr()
+        assert module.use_helper() == "helper"
+        assert "helper called" not in capsys.readouterr().out
+        assert module.helper is sys.modules[fake_lib].helper
+        assert list(package._hooked_methods) == [(f"{fake_lib}:", "helper")]
+    finally:
+        sys.modules.pop(consumer, None)